@@ -1,7 +1,19 @@
 import os
 import json
-import requests
+import asyncio
+import contextvars
+import functools
+import httpx
 import re
+import secrets
+import bisect
+import hashlib
+import math
+import sqlite3
+import time
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import Application, CommandHandler, ContextTypes, MessageHandler, filters, CallbackQueryHandler
@@ -10,29 +22,923 @@ from oauth2client.service_account import ServiceAccountCredentials
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 import telegram.error
 
+BOOT_STARTED = time.monotonic()
+
 # Initialize bot data
 def init_bot_data(context):
     if "pending_registrations" not in context.bot_data:
         context.bot_data["pending_registrations"] = {}
-    if "network_page" not in context.bot_data:
-        context.bot_data["network_page"] = {}
 
-# Google Sheets setup
+# Operational counters, listed on the manager stats screen
+metrics = {}
+
+def inc_metric(name, amount=1):
+    metrics[name] = metrics.get(name, 0) + amount
+
+# Startup-time breakdown (phase -> seconds), printed once warm-up finishes
+startup_timings = {}
+
+def record_startup(phase, started):
+    startup_timings[phase] = time.monotonic() - started
+
+# Fire-and-forget tasks are referenced here until done so they can't be garbage collected
+background_tasks = set()
+
+def spawn_task(coro):
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+# Sheets access layer: gspread is synchronous, so every worksheet call runs in a
+# bounded thread pool and is awaited from the handlers instead of blocking the loop.
+SHEETS_POOL_SIZE = int(os.environ.get("SHEETS_POOL_SIZE", "4"))
+SHEETS_CALL_TIMEOUT = float(os.environ.get("SHEETS_CALL_TIMEOUT", "15"))  # seconds
+sheets_executor = ThreadPoolExecutor(max_workers=SHEETS_POOL_SIZE, thread_name_prefix="sheets")
+
+async def run_sheets(func, *args, timeout=None, **kwargs):
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(sheets_executor, functools.partial(func, *args, **kwargs))
+    return await asyncio.wait_for(future, timeout or SHEETS_CALL_TIMEOUT)
+
+# Quota governor: every worksheet call takes a token from the read or write bucket
+# (refilled at SHEETS_READS/WRITES_PER_MINUTE). Background work (warm-up, replica
+# sync) waits while handlers are queued and leaves SHEETS_BACKGROUND_RESERVE of each
+# bucket to them; a 429 pauses the bucket with exponential back-off and retries.
+SHEETS_READS_PER_MINUTE = int(os.environ.get("SHEETS_READS_PER_MINUTE", "60"))
+SHEETS_WRITES_PER_MINUTE = int(os.environ.get("SHEETS_WRITES_PER_MINUTE", "60"))
+SHEETS_BACKGROUND_RESERVE = float(os.environ.get("SHEETS_BACKGROUND_RESERVE", "0.25"))
+SHEETS_QUOTA_RETRIES = int(os.environ.get("SHEETS_QUOTA_RETRIES", "4"))
+SHEETS_WRITE_METHODS = {"append_row", "append_rows", "update", "update_cell", "update_cells",
+                        "batch_update", "batch_clear", "clear", "delete_rows", "insert_row"}
+sheets_priority = contextvars.ContextVar("sheets_priority", default="interactive")
+
+class SheetsQuota:
+    def __init__(self, name, per_minute):
+        self.name = name
+        self.rate = per_minute / 60
+        self.capacity = max(1, per_minute // 4)  # bursts of up to 15s worth of quota
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.backoff = 0
+        self.waiting = {"interactive": 0, "background": 0}
+
+    async def acquire(self, priority):
+        self.waiting[priority] += 1
+        try:
+            waited = False
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                floor = 1 if priority == "interactive" else min(self.capacity, 1 + self.capacity * SHEETS_BACKGROUND_RESERVE)
+                if now >= self.paused_until and self.tokens >= floor and \
+                        (priority == "interactive" or not self.waiting["interactive"]):
+                    self.tokens -= 1
+                    return
+                if not waited:
+                    inc_metric(f"sheets_{self.name}_{priority}_waits")
+                    waited = True
+                await asyncio.sleep(max(self.paused_until - now, (floor - self.tokens) / self.rate, 0.05))
+        finally:
+            self.waiting[priority] -= 1
+
+    def throttled(self):
+        self.backoff = min(max(self.backoff * 2, 1), 64)
+        self.paused_until = time.monotonic() + self.backoff
+        self.tokens = 0.0
+        inc_metric(f"sheets_{self.name}_429s")
+
+    def succeeded(self):
+        self.backoff = 0
+
+sheets_quota = {
+    "read": SheetsQuota("read", SHEETS_READS_PER_MINUTE),
+    "write": SheetsQuota("write", SHEETS_WRITES_PER_MINUTE),
+}
+
+async def run_governed(kind, func, timeout=None):
+    # run_sheets(func) under the "read" or "write" quota
+    quota = sheets_quota[kind]
+    for attempt in range(SHEETS_QUOTA_RETRIES):
+        await quota.acquire(sheets_priority.get())
+        try:
+            result = await run_sheets(func, timeout=timeout)
+        except gspread.exceptions.APIError as e:
+            if e.code != 429 or attempt == SHEETS_QUOTA_RETRIES - 1:
+                raise
+            quota.throttled()
+            continue
+        quota.succeeded()
+        return result
+
+# Write-behind appends: rows are buffered per worksheet and written with one
+# append_rows call every APPEND_FLUSH_INTERVAL_MS or APPEND_BATCH_SIZE rows.
+APPEND_FLUSH_INTERVAL = int(os.environ.get("APPEND_FLUSH_INTERVAL_MS", "500")) / 1000
+APPEND_BATCH_SIZE = int(os.environ.get("APPEND_BATCH_SIZE", "20"))
+APPEND_MAX_RETRIES = int(os.environ.get("APPEND_MAX_RETRIES", "5"))
+RETRYABLE_API_CODES = {429, 500, 503}
+# Errors about the rows themselves (e.g. an invalid value); auth, permission or
+# missing-sheet errors (401/403/404) keep the rows queued instead
+ROW_REJECTED_API_CODES = {400}
+# Cell writes made within CELL_WRITE_WINDOW_MS of each other share one batch_update
+CELL_WRITE_WINDOW = int(os.environ.get("CELL_WRITE_WINDOW_MS", "50")) / 1000
+
+class AsyncWorksheet:
+    instances = []
+
+    def __init__(self, name):
+        self.name = name
+        self.worksheet = None
+        self.pending = []
+        self.batch_full = asyncio.Event()
+        self.flush_lock = asyncio.Lock()
+        self.flush_task = None
+        self.flush_generation = 0
+        self.snapshot = None  # delta sync state: last known values and per-row hashes
+        self.row_hashes = []
+        self.verify_from = 2
+        self.refresh_lock = asyncio.Lock()
+        self.cell_updates = {}  # (row, col) -> value for the next batch_update; the last write wins
+        self.cell_waiters = []
+        self.cell_task = None
+        AsyncWorksheet.instances.append(self)
+
+    def resolve(self):
+        # Blocking: opens the spreadsheet/worksheet on first use, in a sheets thread
+        if self.worksheet is None:
+            self.worksheet = get_spreadsheet().worksheet(self.name)
+        return self.worksheet
+
+    async def call(self, method, *args, timeout=None, **kwargs):
+        kind = "write" if method in SHEETS_WRITE_METHODS else "read"
+        if self.worksheet is None:
+            await run_governed("read", self.resolve, timeout=timeout)  # a metadata read of its own
+        return await run_governed(kind, lambda: getattr(self.resolve(), method)(*args, **kwargs), timeout=timeout)
+
+    # Reads are served from the SQLite replica once it holds this worksheet
+    async def find(self, query, in_column=None, timeout=None):
+        if in_column == 1 and replica_has(self.name):
+            return replica_find(self.name, query)
+        return await self.call("find", query, in_column=in_column, timeout=timeout)
+
+    async def cell(self, row, col, timeout=None):
+        if replica_has(self.name):
+            values = replica_row(self.name, row)
+            return gspread.cell.Cell(row, col, values[col - 1] if col <= len(values) else None)
+        return await self.call("cell", row, col, timeout=timeout)
+
+    async def row_values(self, row, timeout=None):
+        if replica_has(self.name):
+            return strip_trailing_blanks(replica_row(self.name, row))
+        return await self.call("row_values", row, timeout=timeout)
+
+    async def col_values(self, col, timeout=None):
+        if replica_has(self.name):
+            return strip_trailing_blanks([row[col - 1] if col <= len(row) else "" for row in replica_values(self.name)])
+        return await self.call("col_values", col, timeout=timeout)
+
+    async def get_all_values(self, timeout=None):
+        if replica_has(self.name):
+            return replica_values(self.name)
+        return await self.call("get_all_values", timeout=timeout)
+
+    async def get_all_records(self, timeout=None):
+        if replica_has(self.name):
+            return values_to_records(replica_values(self.name))
+        return await self.call("get_all_records", timeout=timeout)
+
+    async def append_row(self, values, timeout=None):
+        return await self.call("append_row", values, timeout=timeout)
+
+    async def update_cell(self, row, col, value):
+        return await self.update_cells([(row, col, value)])
+
+    async def update_cells(self, cells):
+        # cells is [(row, col, value), ...]; resolves once the batch holding them is written
+        future = asyncio.get_running_loop().create_future()
+        for row, col, value in cells:
+            self.cell_updates[(row, col)] = value
+        self.cell_waiters.append(future)
+        if self.cell_task is None or self.cell_task.done():
+            self.cell_task = asyncio.create_task(self._commit_cells())
+        return await asyncio.shield(future)
+
+    async def _commit_cells(self):
+        while self.cell_waiters:
+            await asyncio.sleep(CELL_WRITE_WINDOW)
+            updates, waiters = self.cell_updates, self.cell_waiters
+            self.cell_updates, self.cell_waiters = {}, []
+            data = [{"range": gspread.utils.rowcol_to_a1(row, col), "values": [[value]]}
+                    for (row, col), value in updates.items()]
+            try:
+                result = await self.call("batch_update", data, raw=False)
+            except Exception as e:
+                for future in waiters:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (row, col), value in updates.items():
+                replica_update_cell(self.name, row, col, value)
+            inc_metric("cell_writes", len(updates))
+            inc_metric("cell_write_batches")
+            for future in waiters:
+                if not future.done():
+                    future.set_result(result)
+
+    async def update_row(self, row, values, timeout=None):
+        # One ranged write (e.g. A5:I5) replacing a whole row
+        last_cell = gspread.utils.rowcol_to_a1(row, len(values))
+        result = await self.call("update", [values], f"A{row}:{last_cell}", timeout=timeout)
+        replica_update_row(self.name, row, values)
+        return result
+
+    # Delta sync: one batch_get per refresh reads the header, the ChatID column and
+    # a rolling window of DELTA_VERIFY_ROWS known rows whose hashes are compared;
+    # rows past the known end (by the ChatID column) take a second read. Header
+    # changes (including a column added on the right), a ChatID column that no
+    # longer starts with the known keys (deleted/moved/inserted rows) or a range
+    # the grid no longer holds force a full reload.
+    def set_snapshot(self, values):
+        width = len(values[0]) if values else 0
+        self.snapshot = [pad_row(row, width) for row in values]
+        self.row_hashes = [row_hash(row) for row in self.snapshot]
+        self.verify_from = 2
+
+    async def refresh_values(self):
+        # Returns (values, changed row numbers), or (values, None) after a full reload
+        async with self.refresh_lock:
+            if self.snapshot is None and replica_has(self.name):
+                self.set_snapshot(replica_values(self.name))
+            if not self.snapshot:
+                return await self.full_refresh()
+            header, known = self.snapshot[0], len(self.snapshot)
+            width = len(header)
+            last_col = re.sub(r"\d", "", gspread.utils.rowcol_to_a1(1, max(1, width)))
+            window_end = min(self.verify_from + DELTA_VERIFY_ROWS - 1, known)
+            ranges = ["1:1", "A:A"]
+            if self.verify_from <= window_end:
+                ranges.append(f"A{self.verify_from}:{last_col}{window_end}")
+            try:
+                fetched = await self.call("batch_get", ranges)
+                head_rows, key_rows = fetched[0], fetched[1]
+                window = fetched[2] if len(fetched) > 2 else []
+                # Only ask for rows the ChatID column shows, so the range stays inside the grid
+                appended = (await self.call("batch_get", [f"A{known + 1}:{last_col}{len(key_rows)}"]))[0] \
+                    if len(key_rows) > known else []
+            except gspread.exceptions.APIError as e:
+                if e.code != 400:  # 400: a range past the grid's last row or column
+                    raise
+                inc_metric("delta_sync_full_reloads")
+                return await self.full_refresh()
+            keys = [row[0] if row else "" for row in key_rows]
+            keys += [""] * (known - len(keys))  # the API trims trailing blank ChatIDs
+            if strip_trailing_blanks(head_rows[0] if head_rows else []) != strip_trailing_blanks(header) or \
+                    keys[:known] != [row[0] if row else "" for row in self.snapshot]:
+                inc_metric("delta_sync_full_reloads")
+                return await self.full_refresh()
+            changed = []
+            for number, row in enumerate(window, start=self.verify_from):
+                row = pad_row(row, width)
+                if row_hash(row) != self.row_hashes[number - 1]:
+                    self.snapshot[number - 1], self.row_hashes[number - 1] = row, row_hash(row)
+                    changed.append(number)
+            for number, row in enumerate(appended, start=known + 1):
+                row = pad_row(row, width)
+                self.snapshot.append(row)
+                self.row_hashes.append(row_hash(row))
+                changed.append(number)
+            self.verify_from = window_end + 1 if window_end < known else 2
+            inc_metric("delta_sync_rows", len(changed))
+            return self.snapshot, changed
+
+    async def full_refresh(self):
+        values = await self.call("get_all_values")
+        self.set_snapshot(values)
+        return self.snapshot, None
+
+    def queue_append(self, values):
+        replica_outbox_add(self.name, values)
+        self.pending.append(values)
+        self.schedule_flush()
+
+    def schedule_flush(self):
+        if len(self.pending) >= APPEND_BATCH_SIZE:
+            self.batch_full.set()
+        if self.flush_task is None or self.flush_task.done():
+            self.flush_task = asyncio.create_task(self._flush_pending())
+
+    async def _flush_pending(self):
+        while self.pending:
+            try:
+                await asyncio.wait_for(self.batch_full.wait(), APPEND_FLUSH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self.batch_full.clear()
+            if not await self.flush():
+                break  # rows stay queued until the next append or shutdown
+
+    async def flush(self):
+        async with self.flush_lock:
+            rows, self.pending = self.pending, []
+            done = 0  # rows at the head of the batch that were written or dropped
+            try:
+                if not rows:
+                    return True
+                try:
+                    if not await self.append_batch(rows):
+                        return False
+                    done = len(rows)
+                    return True
+                except gspread.exceptions.APIError as e:
+                    print(f"Sheets append error ({self.name}): {str(e)}")
+                    if e.code not in ROW_REJECTED_API_CODES:
+                        return False
+                # A row was rejected: append row by row, dropping only the rows Sheets rejects
+                for row in rows:
+                    try:
+                        if not await self.append_batch([row]):
+                            return False
+                    except gspread.exceptions.APIError as e:
+                        if e.code not in ROW_REJECTED_API_CODES:
+                            print(f"Sheets append error ({self.name}): {str(e)}")
+                            return False
+                        print(f"Sheets append dropped a row ({self.name}): {row}: {str(e)}")
+                        replica_outbox_drop(self.name)
+                    done += 1
+                return True
+            except Exception as e:
+                print(f"Sheets append error ({self.name}): {str(e)}")
+                return False
+            finally:
+                if done < len(rows):
+                    # Keep the unwritten rows queued (ahead of newer ones) for the next flush
+                    self.pending[:0] = rows[done:]
+                    print(f"Sheets append failed ({self.name}), {len(rows) - done} rows kept for retry")
+
+    async def append_batch(self, rows):
+        # True once written, False after APPEND_MAX_RETRIES retryable failures;
+        # other API errors are raised
+        delay = 1
+        for attempt in range(APPEND_MAX_RETRIES):
+            try:
+                await self.call("append_rows", rows)
+                replica_outbox_flushed(self.name, rows)
+                return True
+            except gspread.exceptions.APIError as e:
+                if e.code not in RETRYABLE_API_CODES:
+                    raise
+            except asyncio.TimeoutError:
+                pass  # the write may still land; retrying favours duplicates over lost rows
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30)
+        return False
+
+DELTA_VERIFY_ROWS = int(os.environ.get("DELTA_VERIFY_ROWS", "200"))
+
+def row_hash(row):
+    return hashlib.sha1(json.dumps(row).encode()).hexdigest()
+
+def pad_row(row, width):
+    row = ["" if value is None else str(value) for value in row[:width]]
+    return row + [""] * (width - len(row))
+
+def values_to_records(values):
+    # Same shape as gspread's get_all_records()
+    if not values:
+        return []
+    return gspread.utils.to_records(values[0], [gspread.utils.numericise_all(row) for row in values[1:]])
+
+async def flush_all_appends():
+    for worksheet in AsyncWorksheet.instances:
+        await worksheet.flush()
+
+# Optional local SQLite (WAL) replica of the worksheets, enabled by SQLITE_REPLICA_PATH.
+# Sheets -> replica: sync_replica() reloads each worksheet every REPLICA_SYNC_INTERVAL.
+# Replica -> Sheets: queued appends are kept in an outbox table until append_rows
+# succeeds, so they survive a restart. All access happens on the event loop thread.
+SQLITE_REPLICA_PATH = os.environ.get("SQLITE_REPLICA_PATH")
+REPLICA_SYNC_INTERVAL = int(os.environ.get("REPLICA_SYNC_INTERVAL", "60"))  # seconds
+replica = {"db": None, "synced": set()}
+
+def get_replica():
+    if replica["db"] is None and SQLITE_REPLICA_PATH:
+        db = sqlite3.connect(SQLITE_REPLICA_PATH)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.executescript("""
+            CREATE TABLE IF NOT EXISTS sheet_rows (sheet TEXT, row INTEGER, key TEXT, data TEXT, PRIMARY KEY (sheet, row));
+            CREATE INDEX IF NOT EXISTS sheet_rows_key ON sheet_rows (sheet, key);
+            CREATE TABLE IF NOT EXISTS sheet_sync (sheet TEXT PRIMARY KEY, synced_at REAL);
+            CREATE TABLE IF NOT EXISTS outbox (id INTEGER PRIMARY KEY AUTOINCREMENT, sheet TEXT, data TEXT);
+        """)
+        replica["synced"] = {sheet for (sheet,) in db.execute("SELECT sheet FROM sheet_sync")}
+        replica["db"] = db
+    return replica["db"]
+
+def replica_has(sheet):
+    return get_replica() is not None and sheet in replica["synced"]
+
+def strip_trailing_blanks(values):
+    values = list(values)
+    while values and values[-1] in ("", None):
+        values.pop()
+    return values
+
+def replica_values(sheet):
+    rows = get_replica().execute("SELECT data FROM sheet_rows WHERE sheet = ? ORDER BY row", (sheet,))
+    return [json.loads(data) for (data,) in rows]
+
+def replica_row(sheet, row):
+    found = get_replica().execute("SELECT data FROM sheet_rows WHERE sheet = ? AND row = ?", (sheet, row)).fetchone()
+    return json.loads(found[0]) if found else []
+
+def replica_find(sheet, value):
+    found = get_replica().execute(
+        "SELECT row FROM sheet_rows WHERE sheet = ? AND key = ? ORDER BY row LIMIT 1", (sheet, str(value))).fetchone()
+    return gspread.cell.Cell(found[0], 1, str(value)) if found else None
+
+def replica_replace(sheet, values):
+    db = get_replica()
+    with db:
+        db.execute("DELETE FROM sheet_rows WHERE sheet = ?", (sheet,))
+        db.executemany(
+            "INSERT INTO sheet_rows (sheet, row, key, data) VALUES (?, ?, ?, ?)",
+            [(sheet, number, str(row[0]) if row else "", json.dumps(row)) for number, row in enumerate(values, start=1)])
+        db.execute("INSERT OR REPLACE INTO sheet_sync (sheet, synced_at) VALUES (?, ?)", (sheet, time.time()))
+    replica["synced"].add(sheet)
+
+def replica_update_cell(sheet, row, col, value):
+    if not replica_has(sheet):
+        return
+    values = replica_row(sheet, row)
+    values += [""] * (col - len(values))
+    values[col - 1] = value
+    replica_update_row(sheet, row, values)
+
+def replica_update_row(sheet, row, values):
+    if not replica_has(sheet):
+        return
+    with get_replica() as db:
+        db.execute("INSERT OR REPLACE INTO sheet_rows (sheet, row, key, data) VALUES (?, ?, ?, ?)",
+                   (sheet, row, str(values[0]), json.dumps(values)))
+
+def replica_outbox_add(sheet, values):
+    if get_replica() is not None:
+        with get_replica() as db:
+            db.execute("INSERT INTO outbox (sheet, data) VALUES (?, ?)", (sheet, json.dumps(values)))
+
+def replica_outbox_flushed(sheet, rows):
+    # Rows reached the sheet: move them from the outbox into the replica
+    db = get_replica()
+    if db is None:
+        return
+    with db:
+        db.execute("DELETE FROM outbox WHERE id IN (SELECT id FROM outbox WHERE sheet = ? ORDER BY id LIMIT ?)",
+                   (sheet, len(rows)))
+        if sheet in replica["synced"]:
+            last = db.execute("SELECT COALESCE(MAX(row), 0) FROM sheet_rows WHERE sheet = ?", (sheet,)).fetchone()[0]
+            db.executemany(
+                "INSERT INTO sheet_rows (sheet, row, key, data) VALUES (?, ?, ?, ?)",
+                [(sheet, last + offset, str(row[0]), json.dumps(row)) for offset, row in enumerate(rows, start=1)])
+    for worksheet in AsyncWorksheet.instances:
+        if worksheet.name == sheet:
+            worksheet.flush_generation += 1
+
+def replica_outbox_drop(sheet):
+    # The oldest queued row was rejected by Sheets and won't be retried
+    if get_replica() is not None:
+        with get_replica() as db:
+            db.execute("DELETE FROM outbox WHERE id = (SELECT MIN(id) FROM outbox WHERE sheet = ?)", (sheet,))
+
+def restore_outbox():
+    # Re-queue appends that had not reached Sheets when the process last stopped
+    db = get_replica()
+    if db is None:
+        return
+    for worksheet in AsyncWorksheet.instances:
+        rows = [json.loads(data) for (data,) in
+                db.execute("SELECT data FROM outbox WHERE sheet = ? ORDER BY id", (worksheet.name,))]
+        if rows:
+            worksheet.pending[:0] = rows
+            worksheet.schedule_flush()
+
+def replica_upsert_rows(sheet, values, numbers):
+    with get_replica() as db:
+        db.executemany(
+            "INSERT OR REPLACE INTO sheet_rows (sheet, row, key, data) VALUES (?, ?, ?, ?)",
+            [(sheet, number, str(values[number - 1][0]), json.dumps(values[number - 1])) for number in numbers])
+        db.execute("INSERT OR REPLACE INTO sheet_sync (sheet, synced_at) VALUES (?, ?)", (sheet, time.time()))
+
+async def sync_replica():
+    # The Drive modifiedTime lets a cycle with no edits anywhere skip all reads
+    try:
+        modified = await run_sheets(lambda: get_spreadsheet().get_lastUpdateTime())
+    except Exception as e:
+        print(f"Replica sync error (modifiedTime): {str(e)}")
+        modified = None
+    if modified and modified == replica.get("modified") and \
+            all(worksheet.name in replica["synced"] for worksheet in AsyncWorksheet.instances):
+        return
+    for worksheet in AsyncWorksheet.instances:
+        generation = worksheet.flush_generation
+        try:
+            values, changed = await worksheet.refresh_values()
+        except Exception as e:
+            print(f"Replica sync error ({worksheet.name}): {str(e)}")
+            modified = None
+            continue
+        if changed is None or worksheet.name not in replica["synced"]:
+            # A full snapshot (also the first sync after get_directory() loaded the
+            # sheet). A flush landing mid-read would be overwritten; the next cycle
+            # picks it up.
+            if generation == worksheet.flush_generation:
+                replica_replace(worksheet.name, values)
+        elif changed:
+            replica_upsert_rows(worksheet.name, values, changed)
+    replica["modified"] = modified
+
+async def replica_sync_loop():
+    sheets_priority.set("background")
+    while True:
+        try:
+            await sync_replica()
+            await flush_all_appends()
+        except Exception as e:
+            print(f"Replica sync error: {str(e)}")  # retried next cycle
+        await asyncio.sleep(REPLICA_SYNC_INTERVAL)
+
+# Google Sheets setup: authorization and the spreadsheet are resolved lazily on
+# first use, so importing the bot makes no network calls
 scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-creds_json_raw = os.environ.get("GOOGLE_CREDENTIALS", "{}")
-creds_json = json.loads(creds_json_raw)
-creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_json, scope)
-client = gspread.authorize(creds)
-sheet = client.open("BenuBotData")
-training_sheet = sheet.worksheet("TrainingSignups")
-network_sheet = sheet.worksheet("NetworkingRegistrations")
-users_sheet = sheet.worksheet("Users")
-collab_sheet = sheet.worksheet("Collaborations")
-companies_sheet = sheet.worksheet("Companies")
+sheets_client = {"spreadsheet": None}
+sheets_client_lock = threading.Lock()
+
+def get_spreadsheet():
+    with sheets_client_lock:
+        if sheets_client["spreadsheet"] is None:
+            creds_json = json.loads(os.environ.get("GOOGLE_CREDENTIALS", "{}"))
+            creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_json, scope)
+            client = gspread.authorize(creds)
+            sheets_client["spreadsheet"] = client.open("BenuBotData")
+        return sheets_client["spreadsheet"]
+
+training_sheet = AsyncWorksheet("TrainingSignups")
+network_sheet = AsyncWorksheet("NetworkingRegistrations")
+users_sheet = AsyncWorksheet("Users")
+collab_sheet = AsyncWorksheet("Collaborations")
+companies_sheet = AsyncWorksheet("Companies")
+PROFILE_SHEETS = {"users": users_sheet, "companies": companies_sheet}
+news_sheet = AsyncWorksheet("NewsSubscribers")
+broadcast_sheet = AsyncWorksheet("Broadcasts")
+
+# In-process cache of the NetworkingRegistrations directory
+NETWORK_COLUMNS = ["ChatID", "Company", "Phone", "Email", "Description", "Manager", "Categories", "RegDate", "PublicEmail"]
+DIRECTORY_CACHE_TTL = int(os.environ.get("DIRECTORY_CACHE_TTL", "300"))  # seconds
+directory_cache = {"records": None, "loaded_at": 0.0}
+directory_lock = asyncio.Lock()
+
+async def get_directory():
+    async with directory_lock:  # concurrent misses share one reload
+        now = time.monotonic()
+        if directory_cache["records"] is not None and now - directory_cache["loaded_at"] < DIRECTORY_CACHE_TTL:
+            inc_metric("directory_cache_hits")
+            return directory_cache["records"]
+        inc_metric("directory_cache_misses")
+        if replica_has(network_sheet.name):
+            records = await network_sheet.get_all_records()
+        else:
+            records = values_to_records((await network_sheet.refresh_values())[0])
+        # Rows still in the write-behind queue are not in the sheet yet
+        records += [dict(zip(NETWORK_COLUMNS, values)) for values in network_sheet.pending]
+        rebuild_directory_indexes(records)
+        directory_cache["records"] = records
+        directory_cache["loaded_at"] = now
+        return records
+
+def invalidate_directory():
+    # Forces a full reload on the next read; prefer add_to_directory/update_directory_entry
+    directory_cache["records"] = None
+
+def add_to_directory(values):
+    # Mirror a row just appended to NetworkingRegistrations into the cache and indexes
+    records = directory_cache["records"]
+    if records is None:
+        return None
+    entry = dict(zip(NETWORK_COLUMNS, values))
+    records.append(entry)
+    index_directory_entry(len(records) - 1, entry)
+    return len(records) - 1
+
+def update_directory_entry(doc_id, entry):
+    records = directory_cache["records"]
+    if records is None or doc_id >= len(records):
+        return
+    records[doc_id] = entry
+    index_directory_entry(doc_id, entry)
+
+def update_directory_profile(chat_id, company_data):
+    # Apply an edited company profile (network_edit flow) to its directory entries;
+    # called by button() on "confirm:done" once the rows are written
+    records = directory_cache["records"] or []
+    for doc_id, entry in enumerate(records):
+        if str(entry.get("ChatID")) == str(chat_id):
+            updated = dict(entry)
+            for field in ("Company", "Phone", "Email", "Description", "Manager", "PublicEmail"):
+                if field in company_data:
+                    updated[field] = company_data[field]
+            if "Categories" in company_data:
+                updated["Categories"] = ",".join(company_data["Categories"])
+            update_directory_entry(doc_id, updated)
+
+def index_directory_entry(doc_id, entry):
+    index_company(doc_id, entry)
+    index_categories(doc_id, entry)
+    index_company_id(doc_id, entry)
+
+def rebuild_directory_indexes(records):
+    search_index["postings"], search_index["terms"], search_index["docs"] = {}, [], {}
+    category_index["postings"], category_index["counts"], category_index["docs"] = {}, {}, {}
+    company_index["by_id"], company_index["by_name"], company_index["docs"] = {}, {}, {}
+    for doc_id, entry in enumerate(records):
+        index_directory_entry(doc_id, entry)
+
+# Keyword search: inverted index over Company, Manager and Description. Documents
+# are positions in the cached directory; terms are kept sorted for prefix lookups.
+SEARCH_FIELD_WEIGHTS = {"Company": 3.0, "Manager": 2.0, "Description": 1.0}
+SEARCH_PREFIX_WEIGHT = 0.5  # a prefix hit counts half as much as a whole-word hit
+search_index = {"postings": {}, "terms": [], "docs": {}}
+
+def tokenize(text):
+    return re.findall(r"\w+", str(text).lower())
+
+def unindex_company(doc_id):
+    postings, terms = search_index["postings"], search_index["terms"]
+    for term in search_index["docs"].pop(doc_id, {}):
+        postings[term].pop(doc_id, None)
+        if not postings[term]:
+            del postings[term]
+            del terms[bisect.bisect_left(terms, term)]
+
+def index_company(doc_id, entry):
+    unindex_company(doc_id)
+    weights = {}
+    for field, weight in SEARCH_FIELD_WEIGHTS.items():
+        for term in tokenize(entry.get(field, "")):
+            weights[term] = weights.get(term, 0.0) + weight
+    postings, terms = search_index["postings"], search_index["terms"]
+    for term, weight in weights.items():
+        if term not in postings:
+            postings[term] = {}
+            bisect.insort(terms, term)
+        postings[term][doc_id] = weight
+    search_index["docs"][doc_id] = weights
+
+def search_directory(text):
+    # Every query word must match a whole word or word prefix; best matches first
+    postings, terms = search_index["postings"], search_index["terms"]
+    scores = None
+    for token in tokenize(text):
+        token_scores = {}
+        pos = bisect.bisect_left(terms, token)
+        while pos < len(terms) and terms[pos].startswith(token):
+            term = terms[pos]
+            factor = 1.0 if term == token else SEARCH_PREFIX_WEIGHT
+            for doc_id, weight in postings[term].items():
+                token_scores[doc_id] = max(token_scores.get(doc_id, 0.0), weight * factor)
+            pos += 1
+        if scores is None:
+            scores = token_scores
+        else:
+            scores = {d: score + token_scores[d] for d, score in scores.items() if d in token_scores}
+        if not scores:
+            return []
+    if scores is None:  # no words at all (empty or punctuation): list everything, as before
+        return sorted(search_index["docs"])
+    return sorted(scores, key=lambda d: (-scores[d], d))
+
+# Category browse: category -> directory positions, with running per-category
+# counts. Custom categories (other_category) get their own lists as they appear.
+category_index = {"postings": {}, "counts": {}, "docs": {}}
+
+def parse_categories(value):
+    return [cat.strip() for cat in str(value).split(",") if cat.strip()]
+
+def index_categories(doc_id, entry):
+    postings, counts = category_index["postings"], category_index["counts"]
+    for cat in category_index["docs"].pop(doc_id, []):
+        postings[cat].discard(doc_id)
+        counts[cat] -= 1
+        if not counts[cat]:
+            del postings[cat], counts[cat]
+    cats = list(dict.fromkeys(parse_categories(entry.get("Categories", ""))))
+    for cat in cats:
+        postings.setdefault(cat, set()).add(doc_id)
+        counts[cat] = counts.get(cat, 0) + 1
+    category_index["docs"][doc_id] = cats
+
+def companies_in_category(category):
+    return category_index["postings"].get(category, set())
+
+# Stable short company IDs (derived from the owner's ChatID) used in callback data,
+# with hash indexes ID -> directory position and lowercased name -> ID
+company_index = {"by_id": {}, "by_name": {}, "docs": {}}
+
+def company_id(entry):
+    owner = str(entry.get("ChatID") or entry.get("Company", ""))
+    return hashlib.sha1(owner.encode()).hexdigest()[:8]
+
+def index_company_id(doc_id, entry):
+    by_id, by_name = company_index["by_id"], company_index["by_name"]
+    old = company_index["docs"].pop(doc_id, None)
+    if old:
+        if by_id.get(old[0]) == doc_id:
+            del by_id[old[0]]
+        if by_name.get(old[1]) == old[0]:
+            del by_name[old[1]]
+    cid, name = company_id(entry), str(entry.get("Company", "")).strip().lower()
+    by_id[cid] = doc_id  # a later row for the same owner wins
+    by_name[name] = cid
+    company_index["docs"][doc_id] = (cid, name)
+
+async def find_company(ref):
+    # ref is a company ID; plain names from older buttons are still accepted
+    records = await get_directory()
+    doc_id = company_index["by_id"].get(ref)
+    if doc_id is None:
+        doc_id = company_index["by_id"].get(company_index["by_name"].get(ref.strip().lower()))
+    return records[doc_id] if doc_id is not None and doc_id < len(records) else None
+
+async def registration_row(chat_id):
+    # Sheet row of the chat's NetworkingRegistrations entry via the ChatID-keyed ID
+    # index (directory position + 2), or None when it is not in the sheet yet
+    records = await get_directory()
+    doc_id = company_index["by_id"].get(company_id({"ChatID": str(chat_id)}))
+    if doc_id is None or doc_id >= len(records) - len(network_sheet.pending):
+        return None, doc_id
+    row = doc_id + 2
+    # The sheet may have been edited by hand since the directory was loaded
+    if str((await network_sheet.cell(row, 1)).value) != str(chat_id):
+        found = await network_sheet.find(str(chat_id), in_column=1)
+        row = found.row if found else None
+    return row, doc_id
+
+def duplicate_rows(keys):
+    # Row numbers of all but the newest row per ChatID; keys is column A, header first
+    last = {key: number for number, key in enumerate(keys, start=1) if number > 1 and key}
+    return [number for number, key in enumerate(keys, start=1) if number > 1 and key and last[key] != number]
+
+def delete_rows_request(sheet_id, numbers):
+    # One batchUpdate body deleting the given rows, bottom-up so no delete shifts another
+    return {"requests": [
+        {"deleteDimension": {"range": {"sheetId": sheet_id, "dimension": "ROWS",
+                                       "startIndex": number - 1, "endIndex": number}}}
+        for number in sorted(numbers, reverse=True)]}
+
+# Directory result sets: the filtered, ordered company IDs of a listing are kept
+# under a short cursor token, so paging only carries "page:{cursor}:{page}".
+# IDs rather than directory positions, which shift when the directory reloads.
+NETWORK_CURSOR_TTL = int(os.environ.get("NETWORK_CURSOR_TTL", "900"))  # idle seconds
+result_sets = {}  # cursor -> {"chat_id", "company_ids", "used_at"}
+
+def save_result_set(chat_id, company_ids):
+    now = time.monotonic()
+    for cursor in [c for c, entry in result_sets.items() if now - entry["used_at"] > NETWORK_CURSOR_TTL]:
+        del result_sets[cursor]
+    cursor = secrets.token_urlsafe(6)
+    result_sets[cursor] = {"chat_id": str(chat_id), "company_ids": list(company_ids), "used_at": now}
+    return cursor
+
+def get_result_set(cursor, chat_id):
+    entry = result_sets.get(cursor)
+    now = time.monotonic()
+    if not entry or entry["chat_id"] != str(chat_id) or now - entry["used_at"] > NETWORK_CURSOR_TTL:
+        return None
+    entry["used_at"] = now
+    return entry["company_ids"]
+
+# Approval status index: chat_id -> Status for the Users and Companies worksheets,
+# rebuilt every APPROVAL_INDEX_TTL and updated by every lookup_profile(). The same
+# pass records each chat's row number and the header rows used by lookup_profile().
+# A chat the index doesn't show as approved is re-read from the sheet, at most once
+# per APPROVAL_RECHECK_INTERVAL, so approvals show up without waiting for the TTL.
+APPROVAL_INDEX_TTL = int(os.environ.get("APPROVAL_INDEX_TTL", "600"))  # seconds
+APPROVAL_RECHECK_INTERVAL = int(os.environ.get("APPROVAL_RECHECK_INTERVAL", "30"))  # seconds
+approval_index = {"users": None, "companies": None, "rows": {}, "headers": {}, "loaded_at": 0.0, "checked": {}}
+approval_lock = asyncio.Lock()
+
+def header_record(header, row):
+    # A worksheet row as a dict keyed by the header row's column names
+    return dict(zip(header, pad_row(row, len(header))))
+
+async def load_approval_index():
+    async with approval_lock:
+        if approval_index["users"] is not None and \
+                time.monotonic() - approval_index["loaded_at"] < APPROVAL_INDEX_TTL:
+            return
+        for kind, worksheet in PROFILE_SHEETS.items():
+            values = await worksheet.get_all_values()
+            header = values[0] if values else []
+            statuses, rows = {}, {}
+            for number, row in enumerate(values[1:], start=2):
+                if row and row[0] not in rows:  # the first row wins, as with find()
+                    statuses[row[0]] = header_record(header, row).get("Status", "")
+                    rows[row[0]] = number
+            approval_index["headers"][kind], approval_index["rows"][kind] = header, rows
+            approval_index[kind] = statuses
+        approval_index["loaded_at"], approval_index["checked"] = time.monotonic(), {}
+
+async def is_approved(chat_id):
+    await load_approval_index()
+    chat_id = str(chat_id)
+    if approval_index["users"].get(chat_id) == "Approved" or \
+            approval_index["companies"].get(chat_id) == "Approved":
+        return True
+    now = time.monotonic()
+    checked = approval_index["checked"].get(chat_id)
+    if checked is not None and now - checked < APPROVAL_RECHECK_INTERVAL:
+        return False
+    approval_index["checked"][chat_id] = now
+    profile = await lookup_profile(chat_id)
+    return any(record and record.get("Status") == "Approved" for record in profile.values())
+
+def set_approval_status(kind, chat_id, status):
+    # kind is "users" or "companies"; button() calls it when a registration row is
+    # queued and when the manager approves/rejects one. Status edits made directly
+    # in the sheet show up through the APPROVAL_RECHECK_INTERVAL recheck instead.
+    if approval_index[kind] is not None:
+        approval_index[kind][str(chat_id)] = status
+
+async def lookup_profile(chat_id):
+    # The chat's Users and Companies rows as header-keyed dicts (None when absent).
+    # Row numbers come from the approval index, so both rows and their headers are
+    # read with one values-batchGet; rows the index doesn't know fall back to find().
+    await load_approval_index()
+    chat_id = str(chat_id)
+    profile, ranges = {}, []
+    for kind, worksheet in PROFILE_SHEETS.items():
+        header = approval_index["headers"][kind]
+        queued = [values for values in worksheet.pending if values and str(values[0]) == chat_id]
+        row = approval_index["rows"][kind].get(chat_id)
+        profile[kind] = None
+        if row is None and queued:
+            profile[kind] = header_record(header, queued[0])
+        elif row is not None and replica_has(worksheet.name):
+            profile[kind] = header_record(replica_row(worksheet.name, 1), replica_row(worksheet.name, row))
+        else:
+            ranges.append((kind, row))
+    fetched = []
+    if any(row for kind, row in ranges):
+        names = [gspread.utils.absolute_range_name(PROFILE_SHEETS[kind].name, r)
+                 for kind, row in ranges if row for r in ("1:1", f"{row}:{row}")]
+        response = await run_governed("read", lambda: get_spreadsheet().values_batch_get(names))
+        fetched = [value_range.get("values", []) for value_range in response.get("valueRanges", [])]
+    for kind, row in ranges:
+        worksheet = PROFILE_SHEETS[kind]
+        if row:
+            header, values = fetched.pop(0), fetched.pop(0)
+            header, values = header[0] if header else [], values[0] if values else []
+            if values and str(values[0]) == chat_id:
+                approval_index["headers"][kind] = header
+                profile[kind] = header_record(header, values)
+                continue
+        # Unknown or moved row (hand edits, rows added since the index was built)
+        found = await worksheet.find(chat_id, in_column=1)
+        if found:
+            approval_index["rows"][kind][chat_id] = found.row
+            profile[kind] = header_record(approval_index["headers"][kind], await worksheet.row_values(found.row))
+    for kind, record in profile.items():
+        if record is not None:
+            approval_index[kind][chat_id] = record.get("Status", "")
+    return profile
+
+# Per-user connection counters (rows in Collaborations per ChatID), seeded once
+# and incremented on every append, for constant-time badge checks
+CONNECTOR_BADGE = os.environ.get("CONNECTOR_BADGE", "Connector")
+CONNECTOR_BADGE_MIN_CONNECTIONS = int(os.environ.get("CONNECTOR_BADGE_MIN_CONNECTIONS", "5"))
+connection_index = {"counts": None}
+connection_lock = asyncio.Lock()
+badge_awarded = set()
+
+async def get_connection_count(chat_id):
+    async with connection_lock:
+        if connection_index["counts"] is None:
+            counts = {}
+            for value in (await collab_sheet.col_values(1))[1:]:  # ChatID column
+                counts[value] = counts.get(value, 0) + 1
+            for row in collab_sheet.pending:
+                counts[row[0]] = counts.get(row[0], 0) + 1
+            connection_index["counts"] = counts
+    return connection_index["counts"].get(str(chat_id), 0)
+
+def add_connection(chat_id, company, text):
+    collab_sheet.queue_append([str(chat_id), company, text, datetime.now().isoformat()])
+    counts = connection_index["counts"]
+    if counts is not None:
+        counts[str(chat_id)] = counts.get(str(chat_id), 0) + 1
 
 # Scheduler for notifications
-scheduler = AsyncIOScheduler()
-scheduler.start()
+scheduler = AsyncIOScheduler()  # started in post_init, once the event loop runs
 
 # Manager’s Telegram ID
 MANAGER_CHAT_ID = "499281665"
@@ -40,6 +946,199 @@ MANAGER_CHAT_ID = "499281665"
 # Hugging Face API setup
 HF_API_KEY = os.environ.get("HF_API_KEY")
 HF_API_URL = "https://api-inference.huggingface.co/models/mistralai/Mistral-7B-Instruct-v0.1"
+HF_CONNECT_TIMEOUT = float(os.environ.get("HF_CONNECT_TIMEOUT", "5"))  # seconds
+HF_READ_TIMEOUT = float(os.environ.get("HF_READ_TIMEOUT", "10"))  # seconds
+HF_MAX_CONCURRENCY = int(os.environ.get("HF_MAX_CONCURRENCY", "4"))
+hf_client = None
+hf_semaphore = asyncio.Semaphore(HF_MAX_CONCURRENCY)
+
+def get_hf_client():
+    # One pooled keep-alive client for the inference endpoint
+    global hf_client
+    if hf_client is None:
+        hf_client = httpx.AsyncClient(
+            headers={"Authorization": f"Bearer {HF_API_KEY}", "Content-Type": "application/json"},
+            timeout=httpx.Timeout(HF_READ_TIMEOUT, connect=HF_CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=HF_MAX_CONCURRENCY, max_keepalive_connections=HF_MAX_CONCURRENCY)
+        )
+    return hf_client
+
+async def close_hf_client():
+    global hf_client
+    if hf_client is not None:
+        await hf_client.aclose()
+        hf_client = None
+
+# Answer cache for /ask, keyed on the normalized question (LRU + TTL), optionally
+# persisted to ANSWER_CACHE_FILE so it survives restarts
+ANSWER_CACHE_SIZE = int(os.environ.get("ANSWER_CACHE_SIZE", "500"))
+ANSWER_CACHE_TTL = int(os.environ.get("ANSWER_CACHE_TTL", str(7 * 24 * 3600)))  # seconds
+ANSWER_CACHE_FILE = os.environ.get("ANSWER_CACHE_FILE")
+answer_cache = OrderedDict()  # normalized question -> (answer, stored_at)
+answer_cache_state = {"loaded": False}
+
+def normalize_question(question):
+    return " ".join(re.sub(r"[^\w\s]", " ", question.lower()).split())
+
+def load_answer_cache():
+    answer_cache_state["loaded"] = True
+    if not ANSWER_CACHE_FILE or not os.path.exists(ANSWER_CACHE_FILE):
+        return
+    try:
+        with open(ANSWER_CACHE_FILE) as f:
+            entries = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Answer cache load error: {str(e)}")
+        return
+    now = time.time()
+    for key, answer, stored_at in entries[-ANSWER_CACHE_SIZE:]:
+        if now - stored_at < ANSWER_CACHE_TTL:
+            answer_cache[key] = (answer, stored_at)
+
+def save_answer_cache():
+    if not ANSWER_CACHE_FILE:
+        return
+    try:
+        with open(ANSWER_CACHE_FILE + ".tmp", "w") as f:
+            json.dump([[key, answer, stored_at] for key, (answer, stored_at) in answer_cache.items()], f)
+        os.replace(ANSWER_CACHE_FILE + ".tmp", ANSWER_CACHE_FILE)
+    except OSError as e:
+        print(f"Answer cache save error: {str(e)}")
+
+def get_cached_answer(question):
+    if not answer_cache_state["loaded"]:
+        load_answer_cache()
+    key = normalize_question(question)
+    entry = answer_cache.get(key)
+    if entry and time.time() - entry[1] < ANSWER_CACHE_TTL:
+        answer_cache.move_to_end(key)
+        inc_metric("answer_cache_hits")
+        return entry[0]
+    if entry:
+        del answer_cache[key]
+    inc_metric("answer_cache_misses")
+    return None
+
+def cache_answer(question, answer):
+    key = normalize_question(question)
+    answer_cache[key] = (answer, time.time())
+    answer_cache.move_to_end(key)
+    while len(answer_cache) > ANSWER_CACHE_SIZE:
+        answer_cache.popitem(last=False)
+
+def model_prompt(question):
+    return f"You are a helpful AI for startup founders. {question}"
+
+def model_payload(inputs):
+    return {
+        "inputs": inputs,
+        "parameters": {
+            "max_new_tokens": 200,
+            "temperature": 0.7,
+            "return_full_text": False
+        }
+    }
+
+async def post_model_inputs(prompts):
+    # One request for one or more prompts; answers come back in prompt order.
+    # The breaker counts the request once, however many prompts it carries.
+    inputs = prompts[0] if len(prompts) == 1 else prompts
+    try:
+        async with hf_semaphore:
+            response = await get_hf_client().post(HF_API_URL, json=model_payload(inputs))
+        response.raise_for_status()
+        results = response.json()
+        if len(results) != len(prompts):
+            raise ValueError(f"expected {len(prompts)} generations, got {len(results)}")
+        answers = [(item[0] if isinstance(item, list) else item)["generated_text"].strip() for item in results]
+    except Exception:
+        breaker_record(False)
+        raise
+    breaker_record(True)
+    return answers
+
+# Micro-batching: prompts arriving within MODEL_BATCH_WINDOW_MS of each other are
+# sent as one request of up to MODEL_BATCH_MAX inputs (1 disables batching)
+MODEL_BATCH_WINDOW = int(os.environ.get("MODEL_BATCH_WINDOW_MS", "100")) / 1000
+MODEL_BATCH_MAX = int(os.environ.get("MODEL_BATCH_MAX", "8"))
+model_batch = {"pending": [], "timer": None}
+
+async def send_model_batch(batch):
+    inc_metric("model_batches")
+    inc_metric("model_batched_prompts", len(batch))
+    try:
+        answers = await post_model_inputs([prompt for prompt, _ in batch])
+    except Exception as e:
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(e)
+    else:
+        for (_, future), answer in zip(batch, answers):
+            if not future.done():
+                future.set_result(answer)
+
+def flush_model_batch():
+    if model_batch["timer"] is not None:
+        model_batch["timer"].cancel()
+        model_batch["timer"] = None
+    batch, model_batch["pending"] = model_batch["pending"], []
+    if batch:
+        spawn_task(send_model_batch(batch))
+
+async def query_model(question):
+    if MODEL_BATCH_MAX <= 1:
+        return (await post_model_inputs([model_prompt(question)]))[0]
+    future = asyncio.get_running_loop().create_future()
+    model_batch["pending"].append((model_prompt(question), future))
+    if len(model_batch["pending"]) >= MODEL_BATCH_MAX:
+        flush_model_batch()
+    elif model_batch["timer"] is None:
+        model_batch["timer"] = asyncio.get_running_loop().call_later(MODEL_BATCH_WINDOW, flush_model_batch)
+    return await future
+
+# Streaming mode: tokens arrive as server-sent events and on_text(partial) is
+# awaited after each one
+HF_STREAMING = os.environ.get("HF_STREAMING", "1") == "1"
+STREAM_EDIT_INTERVAL = float(os.environ.get("STREAM_EDIT_INTERVAL", "1.5"))  # seconds between message edits
+
+async def stream_model(question, on_text):
+    payload = model_payload(model_prompt(question))
+    payload["stream"] = True
+    text = ""
+    async with hf_semaphore:
+        async with get_hf_client().stream("POST", HF_API_URL, json=payload) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                event = json.loads(line[5:])
+                if "error" in event:
+                    raise RuntimeError(event["error"])
+                token = event.get("token") or {}
+                if not token.get("special"):
+                    text += token.get("text", "")
+                if event.get("generated_text") is not None:
+                    text = event["generated_text"]
+                await on_text(text.strip())
+    return text.strip()
+
+def progress_editor(message):
+    # Throttled plain-text edits of the placeholder reply; Markdown is only
+    # applied to the final answer since partial text may not parse
+    state = {"last_edit": 0.0, "text": ""}
+
+    async def on_text(text):
+        now = time.monotonic()
+        if not text or text == state["text"] or now - state["last_edit"] < STREAM_EDIT_INTERVAL:
+            return
+        state["last_edit"], state["text"] = now, text
+        try:
+            await message.edit_text(f"📝 {text} …")
+        except telegram.error.RetryAfter as e:
+            state["last_edit"] = now + e.retry_after
+        except telegram.error.TelegramError:
+            pass
+    return on_text
 
 # Training data
 UPCOMING_TRAININGS = [
@@ -119,6 +1218,8 @@ MESSAGES = {
     "update_profile": "Update Profile",
     "ask_prompt": "Please type your question, and I’ll get an answer for you!",
     "ask_error": "Sorry, I’m having trouble answering right now. Try again later!",
+    "ask_queued": "You’re number {position} in line. Your answer is on its way!",
+    "ask_busy": "I’m answering a lot of questions right now. Please try again in a minute!",
     "resources_title": "Available Training Resources:",
     "no_resources": "No resources available yet.",
     "trainings_past": "Past Training Events:",
@@ -130,6 +1231,12 @@ MESSAGES = {
     "news_title": "Latest Announcements:",
     "contact_info": "Contact Us:\nEmail: benu@example.com\nPhone: +251921756683\nAddress: Addis Ababa, Bole Sub city, Woreda 03, H.N. 4/10/A5/FL8",
     "subscribed": "Subscribed to news updates!",
+    "already_subscribed": "You’re subscribed to news updates.",
+    "unsubscribed": "Unsubscribed from news updates.",
+    "broadcast_usage": "Usage: /broadcast <announcement>",
+    "broadcast_running": "A broadcast is already running ({done}/{total} sent).",
+    "broadcast_started": "Broadcasting to {total} subscribers...",
+    "broadcast_report": "Broadcast finished: {delivered} delivered, {failed} failed of {total} subscribers in {seconds:.0f}s ({rate:.1f} msg/s).",
     "signup_thanks": "Thanks for signing up, {name}!",
     "register_thanks": "Registered {company} in the network!",
     "phone_prompt": "Please provide your phone number (Step {step}/{total}):",
@@ -182,6 +1289,438 @@ MESSAGES = {
     "registration_rejected": "Your registration was not approved. Please contact support."
 }
 
+# Circuit breaker around the model call: opens after HF_BREAKER_FAILURES
+# consecutive failures, fails fast while open, and lets one probe through after
+# HF_BREAKER_COOLDOWN seconds (half-open) to test recovery
+HF_BREAKER_FAILURES = int(os.environ.get("HF_BREAKER_FAILURES", "3"))
+HF_BREAKER_COOLDOWN = float(os.environ.get("HF_BREAKER_COOLDOWN", "30"))  # seconds
+hf_breaker = {"state": "closed", "failures": 0, "changed_at": 0.0}
+
+class CircuitOpen(Exception):
+    pass
+
+def set_breaker_state(state):
+    if hf_breaker["state"] != state:
+        print(f"HF circuit breaker: {hf_breaker['state']} -> {state}")
+        hf_breaker["state"] = state
+        inc_metric(f"hf_breaker_{state}")
+        metrics["hf_breaker_is_open"] = int(state == "open")
+    hf_breaker["changed_at"] = time.monotonic()
+
+def breaker_is_open():
+    # Open or probing; a probe that never reported back is retried after another cooldown
+    return hf_breaker["state"] != "closed" and \
+        time.monotonic() - hf_breaker["changed_at"] < HF_BREAKER_COOLDOWN
+
+def breaker_acquire():
+    # Raises CircuitOpen unless this call may go upstream
+    if breaker_is_open():
+        inc_metric("hf_breaker_fast_fail")
+        raise CircuitOpen()
+    if hf_breaker["state"] != "closed":
+        set_breaker_state("half_open")  # this call is the probe
+
+def breaker_record(success):
+    if success:
+        hf_breaker["failures"] = 0
+        set_breaker_state("closed")
+        return
+    hf_breaker["failures"] += 1
+    if hf_breaker["state"] == "half_open" or hf_breaker["failures"] >= HF_BREAKER_FAILURES:
+        set_breaker_state("open")
+
+# Single-flight: identical questions arriving while one is already being answered
+# wait on that request instead of sending their own
+inflight_answers = {}  # normalized question -> asyncio.Task
+
+async def answer_and_cache(question, on_text=None):
+    breaker_acquire()
+    if on_text and HF_STREAMING:
+        try:
+            answer = await stream_model(question, on_text)
+        except Exception:
+            breaker_record(False)
+            raise
+        breaker_record(True)
+    else:
+        answer = await query_model(question)  # post_model_inputs reports to the breaker
+    cache_answer(question, answer)
+    return answer
+
+async def fetch_answer(question, on_text=None):
+    # Only the caller that starts the request receives streamed progress
+    key = normalize_question(question)
+    task = inflight_answers.get(key)
+    if task is None:
+        task = asyncio.ensure_future(answer_and_cache(question, on_text))
+        inflight_answers[key] = task
+        task.add_done_callback(lambda _: inflight_answers.pop(key, None))
+    else:
+        inc_metric("answer_coalesced")
+    # shield: one caller giving up must not cancel the shared request
+    return await asyncio.shield(task)
+
+# Fair-share scheduler for model calls: one FIFO per chat, served round-robin by
+# at most ASK_WORKERS workers, with at most ASK_MAX_QUEUE questions waiting.
+# By default there is one worker per HF connection, or enough to fill every
+# connection with a full batch when micro-batching is in use (HF_STREAMING=0).
+ASK_WORKERS = int(os.environ.get(
+    "ASK_WORKERS", str(HF_MAX_CONCURRENCY * (1 if HF_STREAMING else max(1, MODEL_BATCH_MAX)))))
+ASK_MAX_QUEUE = int(os.environ.get("ASK_MAX_QUEUE", "20"))
+ask_queues = OrderedDict()  # chat_id -> deque of (job, future); first key is served next
+ask_state = {"queued": 0, "workers": 0}
+
+class AskQueueFull(Exception):
+    pass
+
+def queue_position(chat_id):
+    # Questions ahead of the newest one from chat_id in round-robin order
+    rank = len(ask_queues[chat_id]) - 1
+    ahead, seen_own = rank, False
+    for other, jobs in ask_queues.items():
+        if other == chat_id:
+            seen_own = True
+        else:
+            ahead += min(len(jobs), rank if seen_own else rank + 1)
+    return ahead
+
+def enqueue_ask(chat_id, job):
+    if ask_state["queued"] >= ASK_MAX_QUEUE:
+        inc_metric("ask_rejected_busy")
+        raise AskQueueFull()
+    future = asyncio.get_running_loop().create_future()
+    if ask_state["workers"] < ASK_WORKERS:
+        ask_state["workers"] += 1
+        spawn_task(ask_worker(job, future))
+        return future, 0
+    ask_queues.setdefault(chat_id, deque()).append((job, future))
+    ask_state["queued"] += 1
+    return future, queue_position(chat_id) + 1
+
+async def run_ask_job(job, future):
+    try:
+        result = await job()
+    except Exception as e:
+        if not future.done():
+            future.set_exception(e)
+    else:
+        if not future.done():
+            future.set_result(result)
+
+async def ask_worker(job, future):
+    try:
+        await run_ask_job(job, future)
+        while ask_queues:
+            chat_id, jobs = next(iter(ask_queues.items()))
+            job, future = jobs.popleft()
+            if jobs:
+                ask_queues.move_to_end(chat_id)
+            else:
+                del ask_queues[chat_id]
+            ask_state["queued"] -= 1
+            if not future.done():
+                await run_ask_job(job, future)
+    finally:
+        ask_state["workers"] -= 1
+
+async def answer_question(chat_id, question, placeholder):
+    # Joins an identical in-flight request, otherwise waits for a fair turn
+    if breaker_is_open():
+        inc_metric("hf_breaker_fast_fail")
+        raise CircuitOpen()
+    on_text = progress_editor(placeholder) if HF_STREAMING else None
+    if normalize_question(question) in inflight_answers:
+        return await fetch_answer(question)
+    future, position = enqueue_ask(chat_id, functools.partial(fetch_answer, question, on_text))
+    if position:
+        await placeholder.edit_text(MESSAGES["ask_queued"].format(position=position))
+    return await future
+
+# Local answers: BM25 over training modules, quiz explanations, past trainings and
+# an optional FAQ_FILE (JSON list of {"q", "a", "link"}). Confidence is the
+# idf-weighted share of the question's words found in the best document; the best
+# document must also match LOCAL_ANSWER_MIN_TERMS words and outscore the runner-up
+# by LOCAL_ANSWER_MIN_MARGIN, so a single shared word ("startup") isn't an answer.
+FAQ_FILE = os.environ.get("FAQ_FILE")
+LOCAL_ANSWER_MIN_CONFIDENCE = float(os.environ.get("LOCAL_ANSWER_MIN_CONFIDENCE", "0.75"))
+LOCAL_ANSWER_MIN_TERMS = int(os.environ.get("LOCAL_ANSWER_MIN_TERMS", "2"))
+LOCAL_ANSWER_MIN_MARGIN = float(os.environ.get("LOCAL_ANSWER_MIN_MARGIN", "1.2"))  # best / runner-up score
+BM25_K1, BM25_B = 1.2, 0.75
+STOPWORDS = {
+    "a", "an", "the", "and", "or", "of", "to", "in", "on", "for", "with", "is", "are", "be",
+    "do", "does", "i", "my", "me", "we", "our", "you", "your", "it", "how", "what", "why",
+    "when", "where", "which", "who", "can", "should", "could", "would", "about", "get"
+}
+faq_index = {"docs": None, "df": {}, "avg_len": 0.0}
+
+def faq_terms(text):
+    return [term for term in tokenize(text) if term not in STOPWORDS]
+
+def faq_documents():
+    docs = []
+    for module in TRAINING_MODULES:
+        link = f"📚 Learn more: *{module['name']}* in {MESSAGES['learn_startup_skills']}"
+        docs.append((f"{module['name']} {module['content']}", module["content"], link))
+        for item in module["quiz"]:
+            docs.append((f"{item['q']} {item['answer']} {item['explain']}", f"{item['answer']}. {item['explain']}", link))
+    for training in PAST_TRAININGS:
+        link = f"🎥 {training['name']}: {training['video']}\n📂 Resources: {training['resources']}"
+        docs.append((f"{training['name']} {training['description']}", training["description"], link))
+    if FAQ_FILE and os.path.exists(FAQ_FILE):
+        try:
+            with open(FAQ_FILE) as f:
+                for item in json.load(f):
+                    docs.append((f"{item['q']} {item['a']}", item["a"], item.get("link", "")))
+        except (OSError, ValueError, KeyError) as e:
+            print(f"FAQ file error: {str(e)}")
+    return docs
+
+def build_faq_index():
+    docs, df = [], {}
+    for text, answer, link in faq_documents():
+        terms = faq_terms(text)
+        tf = {}
+        for term in terms:
+            tf[term] = tf.get(term, 0) + 1
+        for term in tf:
+            df[term] = df.get(term, 0) + 1
+        docs.append({"tf": tf, "len": len(terms), "answer": answer, "link": link})
+    faq_index["docs"], faq_index["df"] = docs, df
+    faq_index["avg_len"] = sum(doc["len"] for doc in docs) / max(1, len(docs))
+
+def answer_locally(question):
+    # Returns (answer, link) when training content covers the question well enough
+    if faq_index["docs"] is None:
+        build_faq_index()
+    docs, df = faq_index["docs"], faq_index["df"]
+    terms = set(faq_terms(question))
+    if not terms or not docs:
+        return None
+    idf = {term: math.log(1 + (len(docs) - df.get(term, 0) + 0.5) / (df.get(term, 0) + 0.5)) for term in terms}
+    best, best_score, second_score = None, 0.0, 0.0
+    for doc in docs:
+        score = 0.0
+        for term in terms:
+            tf = doc["tf"].get(term, 0)
+            if tf:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * doc["len"] / faq_index["avg_len"])
+                score += idf[term] * tf * (BM25_K1 + 1) / (tf + norm)
+        if score > best_score:
+            best, best_score, second_score = doc, score, best_score
+        elif score > second_score:
+            second_score = score
+    if best is None:
+        return None
+    matched = [term for term in terms if term in best["tf"]]
+    confidence = sum(idf[term] for term in matched) / sum(idf.values())
+    if confidence < LOCAL_ANSWER_MIN_CONFIDENCE or len(matched) < LOCAL_ANSWER_MIN_TERMS or \
+            best_score < second_score * LOCAL_ANSWER_MIN_MARGIN:
+        return None
+    inc_metric("local_answers")
+    return best["answer"], best["link"]
+
+# News broadcasts: subscriptions are rows appended to the NewsSubscribers worksheet
+# (ChatID, Status, Updated; a chat's latest row wins) and the running broadcast is
+# row 2 of the Broadcasts worksheet, saved in the background after every
+# BROADCAST_SAVE_EVERY finished sends, so a broadcast interrupted by a restart
+# resumes where it stopped. The resumed run re-sends what finished after the last
+# save: about BROADCAST_SAVE_EVERY messages plus those sent while a save was in
+# flight. Recipients are sent to in ChatID order; Cursor is the ChatID up to which
+# every send has finished.
+# Sends are paced to BROADCAST_RATE msg/s overall and one message per chat per
+# BROADCAST_CHAT_INTERVAL; a RetryAfter pauses all sends for the given time.
+BROADCAST_RATE = float(os.environ.get("BROADCAST_RATE", "25"))  # Telegram allows ~30 msg/s
+BROADCAST_CHAT_INTERVAL = float(os.environ.get("BROADCAST_CHAT_INTERVAL", "1"))  # seconds
+BROADCAST_CONCURRENCY = int(os.environ.get("BROADCAST_CONCURRENCY", "10"))
+BROADCAST_SAVE_EVERY = int(os.environ.get("BROADCAST_SAVE_EVERY", "100"))  # finished sends
+BROADCAST_COLUMNS = ["Text", "Started", "Status", "Cursor", "Delivered", "Failed", "Total"]
+broadcast_state = {"subscribers": None, "current": None}
+broadcast_lock = asyncio.Lock()
+broadcast_bucket = {"tokens": 1.0, "updated": 0.0, "paused_until": 0.0}
+chat_last_sent = {}
+
+async def news_subscribers():
+    async with broadcast_lock:
+        if broadcast_state["subscribers"] is None:
+            statuses = {}
+            # Rows still in the write-behind queue are not in the sheet yet
+            for row in (await news_sheet.get_all_values())[1:] + news_sheet.pending:
+                if row and row[0]:
+                    statuses[str(row[0])] = row[1] if len(row) > 1 else ""
+            broadcast_state["subscribers"] = {chat_id for chat_id, status in statuses.items() if status == "Subscribed"}
+    return broadcast_state["subscribers"]
+
+def set_subscription(chat_id, status):
+    # status is "Subscribed", "Unsubscribed" or "Blocked"
+    chat_id = str(chat_id)
+    news_sheet.queue_append([chat_id, status, datetime.now().isoformat()])
+    if broadcast_state["subscribers"] is not None:
+        if status == "Subscribed":
+            broadcast_state["subscribers"].add(chat_id)
+        else:
+            broadcast_state["subscribers"].discard(chat_id)
+
+async def save_broadcast_progress(status="Running"):
+    current = broadcast_state["current"]
+    try:
+        await broadcast_sheet.update_row(2, [current["text"], current["started"], status, current["cursor"],
+                                             current["delivered"], current["failed"], current["total"]])
+    except Exception as e:
+        print(f"Broadcast progress save error: {str(e)}")
+
+async def broadcast_slot(chat_id):
+    # Token bucket (one message of burst) plus the per-chat interval
+    bucket = broadcast_bucket
+    while True:
+        now = time.monotonic()
+        bucket["tokens"] = min(1.0, bucket["tokens"] + (now - bucket["updated"]) * BROADCAST_RATE)
+        bucket["updated"] = now
+        ready = max(bucket["paused_until"], chat_last_sent.get(chat_id, 0.0) + BROADCAST_CHAT_INTERVAL)
+        if now >= ready and bucket["tokens"] >= 1:
+            bucket["tokens"] -= 1
+            chat_last_sent[chat_id] = now
+            return
+        await asyncio.sleep(max(ready - now, (1 - bucket["tokens"]) / BROADCAST_RATE, 0.01))
+
+async def deliver_broadcast(bot, chat_id, text):
+    # True once delivered; False when the chat can't be reached. The caller has
+    # already waited for the first slot, so sends start in recipient order.
+    for attempt in range(3):
+        if attempt:
+            await broadcast_slot(chat_id)
+        try:
+            await bot.send_message(chat_id=chat_id, text=text)
+            return True
+        except telegram.error.RetryAfter as e:
+            inc_metric("broadcast_retry_after")
+            broadcast_bucket["paused_until"] = time.monotonic() + e.retry_after
+        except telegram.error.Forbidden:
+            set_subscription(chat_id, "Blocked")
+            return False
+        except telegram.error.TelegramError as e:
+            print(f"Broadcast error ({chat_id}): {str(e)}")
+            return False
+    return False
+
+async def run_broadcast(bot):
+    sheets_priority.set("background")
+    current = broadcast_state["current"]
+    recipients = sorted(chat_id for chat_id in await news_subscribers() if chat_id > current["cursor"])
+    text = f"📣 {MESSAGES['news_title']}\n\n{current['text']}"
+    semaphore = asyncio.Semaphore(BROADCAST_CONCURRENCY)
+    finished = set()
+    progress = {"next": 0, "saved": 0, "save": None}
+    started = time.monotonic()
+
+    async def send(chat_id):
+        delivered = False
+        try:
+            delivered = await deliver_broadcast(bot, chat_id, text)
+        except Exception as e:
+            print(f"Broadcast error ({chat_id}): {str(e)}")
+        finally:
+            semaphore.release()
+        current["delivered" if delivered else "failed"] += 1
+        finished.add(chat_id)
+        while progress["next"] < len(recipients) and recipients[progress["next"]] in finished:
+            current["cursor"] = recipients[progress["next"]]
+            progress["next"] += 1
+        # One save in flight at a time, off the send path
+        if progress["next"] - progress["saved"] >= BROADCAST_SAVE_EVERY and \
+                (progress["save"] is None or progress["save"].done()):
+            progress["saved"] = progress["next"]
+            progress["save"] = spawn_task(save_broadcast_progress())
+
+    tasks = []
+    try:
+        for chat_id in recipients:
+            await semaphore.acquire()
+            await broadcast_slot(chat_id)
+            tasks.append(asyncio.create_task(send(chat_id)))
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()  # on shutdown; the saved cursor lets the next start resume
+    seconds = time.monotonic() - started
+    if progress["save"]:
+        await progress["save"]  # so a "Running" save can't land after "Finished"
+    await save_broadcast_progress("Finished")
+    inc_metric("broadcast_delivered", current["delivered"])
+    inc_metric("broadcast_failed", current["failed"])
+    broadcast_state["current"] = None
+    chat_last_sent.clear()
+    report = MESSAGES["broadcast_report"].format(
+        delivered=current["delivered"], failed=current["failed"], total=current["total"],
+        seconds=seconds, rate=len(recipients) / seconds if seconds else 0.0)
+    if current.get("resumed"):
+        report += " (resumed after a restart)"
+    try:
+        await bot.send_message(chat_id=MANAGER_CHAT_ID, text=f"📣 {report}")
+    except telegram.error.TelegramError as e:
+        print(f"Broadcast report error: {str(e)}")
+
+async def resume_broadcast(bot):
+    # Started from post_init: finish a broadcast the previous process didn't
+    sheets_priority.set("background")
+    try:
+        record = header_record(BROADCAST_COLUMNS, await broadcast_sheet.row_values(2))
+    except Exception as e:
+        print(f"Broadcast resume error: {str(e)}")
+        return
+    if record["Status"] != "Running" or broadcast_state["current"]:
+        return
+    broadcast_state["current"] = {
+        "text": record["Text"], "started": record["Started"], "cursor": record["Cursor"],
+        "delivered": int(record["Delivered"] or 0), "failed": int(record["Failed"] or 0),
+        "total": int(record["Total"] or 0), "resumed": True,
+    }
+    await run_broadcast(bot)
+
+# Application lifecycle hooks
+async def warm_up():
+    # Fills caches in the background while the webhook is already serving;
+    # a failed step is left to load lazily on first use
+    sheets_priority.set("background")
+    steps = [
+        ("sheets_auth", lambda: run_governed("read", get_spreadsheet, timeout=60)),
+        ("worksheets", lambda: asyncio.gather(*(run_governed("read", ws.resolve) for ws in AsyncWorksheet.instances))),
+        ("directory", get_directory),
+        ("approval_index", load_approval_index),
+        ("connection_counts", lambda: get_connection_count("")),
+    ]
+    for phase, step in steps:
+        started = time.monotonic()
+        try:
+            await step()
+        except Exception as e:
+            print(f"Warm-up {phase} failed: {str(e)}")
+            continue
+        record_startup(f"warm_up.{phase}", started)
+    started = time.monotonic()
+    build_faq_index()
+    record_startup("warm_up.faq_index", started)
+    print("Startup breakdown: " + ", ".join(f"{phase} {seconds:.2f}s" for phase, seconds in startup_timings.items()))
+
+async def post_init(application):
+    # Application.builder().post_init(post_init)
+    record_startup("boot", BOOT_STARTED)
+    scheduler.start()
+    if SQLITE_REPLICA_PATH:
+        restore_outbox()
+        spawn_task(replica_sync_loop())
+    spawn_task(warm_up())
+    spawn_task(resume_broadcast(application.bot))
+
+async def post_shutdown(application):
+    # Application.builder().post_shutdown(post_shutdown): don't lose queued rows
+    if broadcast_state["current"]:
+        await save_broadcast_progress()
+    await flush_all_appends()
+    await close_hf_client()
+    if scheduler.running:
+        scheduler.shutdown(wait=False)
+    save_answer_cache()
+
 # Bot functions
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     context.user_data.clear()  # Clear any previous data
@@ -198,11 +1737,7 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def show_options(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = str(update.callback_query.message.chat_id)
-    # Check approval status
-    user_row = users_sheet.find(chat_id, in_column=1)  # ChatID column
-    company_row = companies_sheet.find(chat_id, in_column=1)  # ChatID column
-    if (user_row and users_sheet.cell(user_row.row, 7).value == "Approved") or \
-       (company_row and companies_sheet.cell(company_row.row, 10).value == "Approved"):
+    if await is_approved(chat_id):
         keyboard = [
             [InlineKeyboardButton(MESSAGES["ask"], callback_data="cmd:ask"),
              InlineKeyboardButton(MESSAGES["resources"], callback_data="cmd:resources")],
@@ -240,8 +1775,6 @@ async def cancel_registration(update: Update, context: ContextTypes.DEFAULT_TYPE
 
 async def networking(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
-    chat_id = query.message.chat_id
-    context.bot_data["network_page"][str(chat_id)] = 0  # Reset page
     keyboard = [
         [InlineKeyboardButton("Browse by Category", callback_data="network:category"),
          InlineKeyboardButton("Search by Keyword", callback_data="network:search")],
@@ -254,6 +1787,7 @@ async def networking(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if query.from_user.id == int(MANAGER_CHAT_ID):
         keyboard.insert(0, [InlineKeyboardButton("View Stats", callback_data="network:stats"),
                             InlineKeyboardButton("Manage Categories", callback_data="network:manage_cat")])
+        keyboard.insert(1, [InlineKeyboardButton("Remove Duplicate Registrations", callback_data="network:compact")])
     await query.message.reply_text(
         f"🌟 *{MESSAGES['networking_title']}* 🌟", 
         reply_markup=InlineKeyboardMarkup(keyboard), 
@@ -270,30 +1804,37 @@ async def network_category(update: Update, context: ContextTypes.DEFAULT_TYPE):
         parse_mode="Markdown"
     )
 
-async def network_list(update: Update, context: ContextTypes.DEFAULT_TYPE, category=None, search=None):
+async def network_list(update: Update, context: ContextTypes.DEFAULT_TYPE, category=None, search=None, cursor=None, page=0):
     query = update.callback_query
-    chat_id = query.message.chat_id
-    page = context.bot_data["network_page"].get(str(chat_id), 0)
-    network_data = network_sheet.get_all_records()
-    companies = []
-
-    for entry in network_data:
-        if category and category not in entry["Categories"].split(","):
-            continue
+    chat_id = (query.message if query else update.message).chat_id
+    network_data = await get_directory()
+    company_ids = get_result_set(cursor, chat_id) if cursor else None
+    if cursor and company_ids is None:
+        await network_results_expired(query)
+        return
+    if company_ids is None:
         if search:
-            search_lower = search.lower()
-            if not (search_lower in entry["Company"].lower() or 
-                    search_lower in entry["Description"].lower() or 
-                    search_lower in entry["Manager"].lower()):
-                continue
-        companies.append(entry)
-
-    total = len(companies)
+            doc_ids = search_directory(search)
+            if category:
+                in_category = companies_in_category(category)
+                doc_ids = [doc_id for doc_id in doc_ids if doc_id in in_category]
+        elif category:
+            doc_ids = sorted(companies_in_category(category))
+        else:
+            doc_ids = list(range(len(network_data)))
+        # One entry per company, shown as its latest row (what find_company() resolves
+        # the ID to), so only companies whose latest row matches the filter are kept
+        company_ids = [company_id(network_data[doc_id]) for doc_id in doc_ids
+                       if company_index["by_id"].get(company_id(network_data[doc_id])) == doc_id]
+        cursor = save_result_set(chat_id, company_ids)
+
+    total = len(company_ids)
     per_page = 5
     start = page * per_page
     end = start + per_page
+    companies = [company for company in [await find_company(cid) for cid in company_ids[start:end]] if company]
     sections = []
-    for company in companies[start:end]:
+    for company in companies:
         contact = company["Phone"] if company["PublicEmail"] == "Yes" else "Private"
         sections.append(
             f"🏢 *{company['Company']}*\n"
@@ -308,14 +1849,32 @@ async def network_list(update: Update, context: ContextTypes.DEFAULT_TYPE, categ
     if total > per_page:
         nav = []
         if page > 0:
-            nav.append(InlineKeyboardButton("⬅️ Previous", callback_data=f"page:{page-1}:{category or ''}:{search or otros}"))
+            nav.append(InlineKeyboardButton("⬅️ Previous", callback_data=f"page:{cursor}:{page-1}"))
         if end < total:
-            nav.append(InlineKeyboardButton("Next ➡️", callback_data=f"page:{page+1}:{category or ''}:{search or ''}"))
+            nav.append(InlineKeyboardButton("Next ➡️", callback_data=f"page:{cursor}:{page+1}"))
         keyboard.append(nav)
-    for company in companies[start:end]:
-        keyboard.append([InlineKeyboardButton(f"Contact {company['Company']}", callback_data=f"connect:{company['Company']}")])
+    for company in companies:
+        keyboard.append([InlineKeyboardButton(f"Contact {company['Company']}", callback_data=f"connect:{company_id(company)}")])
     keyboard.append([InlineKeyboardButton("🔙 Back to Networking", callback_data="cmd:networking")])
-    await query.edit_message_text(text, parse_mode="Markdown", reply_markup=InlineKeyboardMarkup(keyboard))
+    if query:
+        await query.edit_message_text(text, parse_mode="Markdown", reply_markup=InlineKeyboardMarkup(keyboard))
+    else:
+        await update.message.reply_text(text, parse_mode="Markdown", reply_markup=InlineKeyboardMarkup(keyboard))
+
+async def network_results_expired(query):
+    keyboard = [[InlineKeyboardButton("🔙 Back to Networking", callback_data="cmd:networking")]]
+    await query.edit_message_text(
+        "⚠️ These results have expired. Please browse or search again.",
+        parse_mode="Markdown", reply_markup=InlineKeyboardMarkup(keyboard))
+
+async def network_page(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    # callback_data "page:{cursor}:{page}"; older "page:{n}:{cat}:{search}" buttons
+    # from before result sets count as expired
+    parts = update.callback_query.data.split(":")
+    if len(parts) != 3 or not parts[2].isdigit():
+        await network_results_expired(update.callback_query)
+        return
+    await network_list(update, context, cursor=parts[1], page=int(parts[2]))
 
 async def network_search(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
@@ -329,12 +1888,11 @@ async def network_search(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def network_connect(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
-    company = query.data.split("connect:")[1]
-    network_data = network_sheet.get_all_records()
-    entry = next((e for e in network_data if e["Company"] == company), None)
+    entry = await find_company(query.data.split("connect:")[1])
     if not entry:
         await query.edit_message_text("⚠️ Company not found.", parse_mode="Markdown")
         return
+    company = entry["Company"]
     if entry["PublicEmail"] == "Yes":
         text = f"🌟 *Contact {company}* 🌟\nEmail: {entry['Email']}\nPhone: {entry['Phone']}"
     else:
@@ -345,7 +1903,7 @@ async def network_connect(update: Update, context: ContextTypes.DEFAULT_TYPE):
             parse_mode="Markdown"
         )
     keyboard = [
-        [InlineKeyboardButton("Rate Connection", callback_data=f"rate:{company}")],
+        [InlineKeyboardButton("Rate Connection", callback_data=f"rate:{company_id(entry)}")],
         [InlineKeyboardButton("🔙 Back to Networking", callback_data="cmd:networking")]
     ]
     await query.edit_message_text(text, parse_mode="Markdown", reply_markup=InlineKeyboardMarkup(keyboard))
@@ -361,7 +1919,11 @@ async def network_event(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def network_collab(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
-    company = query.data.split("collab:")[1]
+    entry = await find_company(query.data.split("collab:")[1])
+    if not entry:
+        await query.edit_message_text("⚠️ Company not found.", parse_mode="Markdown")
+        return
+    company = entry["Company"]
     context.user_data["collab_company"] = company
     context.user_data["collab_step"] = True
     keyboard = [[InlineKeyboardButton("🔙 Back to Networking", callback_data="cmd:networking")]]
@@ -374,26 +1936,25 @@ async def network_collab(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def network_edit(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     chat_id = query.message.chat_id
-    company_row = companies_sheet.find(str(chat_id), in_column=1)
-    if not company_row:
+    company = (await lookup_profile(chat_id))["companies"]
+    if not company:
         await query.edit_message_text("⚠️ You haven’t registered a company yet.", parse_mode="Markdown")
         return
-    row = companies_sheet.row_values(company_row.row)
     context.user_data["register_step"] = "company"
     context.user_data["edit_mode"] = True
     context.user_data["company_data"] = {
-        "Company": row[1],
-        "Phone": row[2],
-        "Email": row[3],
-        "Description": row[4],
-        "Manager": row[5],
-        "Categories": row[6].split(",") if row[6] else [],
-        "PublicEmail": row[8],
-        "Status": row[9]
+        "Company": company.get("Company", ""),
+        "Phone": company.get("Phone", ""),
+        "Email": company.get("Email", ""),
+        "Description": company.get("Description", ""),
+        "Manager": company.get("Manager", ""),
+        "Categories": company["Categories"].split(",") if company.get("Categories") else [],
+        "PublicEmail": company.get("PublicEmail", ""),
+        "Status": company.get("Status", "")
     }
     keyboard = [[InlineKeyboardButton("🔙 Cancel", callback_data="cmd:cancel")]]
     await query.edit_message_text(
-        f"🌟 *{MESSAGES['company_prompt']}* 🌟\nCurrent: {row[1]}",
+        f"🌟 *{MESSAGES['company_prompt']}* 🌟\nCurrent: {company.get('Company', '')}",
         reply_markup=InlineKeyboardMarkup(keyboard),
         parse_mode="Markdown"
     )
@@ -403,18 +1964,49 @@ async def network_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if query.from_user.id != int(MANAGER_CHAT_ID):
         await query.edit_message_text("⚠️ Manager access only.", parse_mode="Markdown")
         return
-    network_data = network_sheet.get_all_records()
-    cat_counts = {cat: 0 for cat in CATEGORIES if cat != "Other"}
-    for entry in network_data:
-        for cat in entry["Categories"].split(","):
-            if cat in cat_counts:
-                cat_counts[cat] += 1
+    network_data = await get_directory()
+    counts = category_index["counts"]
+    cat_counts = {cat: counts.get(cat, 0) for cat in CATEGORIES if cat != "Other"}
+    cat_counts.update({cat: count for cat, count in counts.items() if cat not in CATEGORIES})
     stats = [f"{cat}: {count} companies" for cat, count in cat_counts.items()]
     stats.append(f"Total: {len(network_data)} companies")
+    stats.extend(f"{name}: {value}" for name, value in sorted(metrics.items()))
     text = MESSAGES["network_stats"].format(stats="\n".join(stats))
     keyboard = [[InlineKeyboardButton("🔙 Back to Networking", callback_data="cmd:networking")]]
     await query.edit_message_text(text, parse_mode="Markdown", reply_markup=InlineKeyboardMarkup(keyboard))
 
+async def network_compact(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    # One-shot cleanup of duplicate NetworkingRegistrations rows left by older appends
+    query = update.callback_query
+    if query.from_user.id != int(MANAGER_CHAT_ID):
+        await query.edit_message_text("⚠️ Manager access only.", parse_mode="Markdown")
+        return
+    await network_sheet.flush()
+    async with network_sheet.flush_lock:  # no appends or in-place updates while rows move
+        keys = [str(key) for key in await network_sheet.call("col_values", 1)]
+        duplicates = duplicate_rows(keys)
+        if duplicates:
+            # Only the duplicate rows are deleted, in one atomic batchUpdate; the
+            # remaining cells (numbers, dates, formulas) are left untouched
+            await run_governed("write", lambda: get_spreadsheet().batch_update(
+                delete_rows_request(network_sheet.resolve().id, duplicates)))
+            network_sheet.snapshot = None
+            network_sheet.flush_generation += 1
+            if replica_has(network_sheet.name):
+                dropped = set(duplicates)
+                replica_replace(network_sheet.name, [row for number, row in
+                                                     enumerate(replica_values(network_sheet.name), start=1)
+                                                     if number not in dropped])
+            invalidate_directory()
+    removed = len(duplicates)
+    inc_metric("registration_duplicates_removed", removed)
+    keyboard = [[InlineKeyboardButton("🔙 Back to Networking", callback_data="cmd:networking")]]
+    await query.edit_message_text(
+        f"🌟 *Removed {removed} duplicate registrations* 🌟",
+        parse_mode="Markdown",
+        reply_markup=InlineKeyboardMarkup(keyboard)
+    )
+
 async def network_manage_cat(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     if query.from_user.id != int(MANAGER_CHAT_ID):
@@ -433,7 +2025,11 @@ async def network_manage_cat(update: Update, context: ContextTypes.DEFAULT_TYPE)
 
 async def network_rate(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
-    company = query.data.split("rate:")[1]
+    entry = await find_company(query.data.split("rate:")[1])
+    if not entry:
+        await query.edit_message_text("⚠️ Company not found.", parse_mode="Markdown")
+        return
+    company = entry["Company"]
     context.user_data["rate_company"] = company
     context.user_data["rate_step"] = True
     keyboard = [[InlineKeyboardButton("🔙 Back to Networking", callback_data="cmd:networking")]]
@@ -454,14 +2050,29 @@ async def network_refer(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def register(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.message.chat_id if update.message else update.callback_query.message.chat_id
     # Check if already registered in Companies
-    company_row = companies_sheet.find(str(chat_id), in_column=1)
-    if company_row and companies_sheet.cell(company_row.row, 10).value == "Approved":
-        row = companies_sheet.row_values(company_row.row)
-        network_sheet.append_row([
-            str(chat_id), row[1], row[2], row[3], row[4], row[5], row[6], row[7], row[8]
-        ])
+    company = (await lookup_profile(chat_id))["companies"]
+    if company and company.get("Status") == "Approved":
+        missing = [column for column in NETWORK_COLUMNS[1:] if column not in company]
+        if missing:
+            print(f"Register error: Companies sheet has no {', '.join(missing)} column")
+            await (update.message.reply_text if update.message else update.callback_query.message.reply_text)(
+                "⚠️ Registration is unavailable right now. Please try again later.",
+                parse_mode="Markdown"
+            )
+            return
+        values = [str(chat_id)] + [company[column] for column in NETWORK_COLUMNS[1:]]
+        # Re-registering updates the existing row in place instead of appending a duplicate.
+        # flush_lock keeps network_compact from moving the row between lookup and write.
+        async with network_sheet.flush_lock:
+            sheet_row, doc_id = await registration_row(chat_id)
+            if sheet_row:
+                await network_sheet.update_row(sheet_row, values)
+                update_directory_entry(doc_id, dict(zip(NETWORK_COLUMNS, values)))
+            else:
+                network_sheet.queue_append(values)
+                add_to_directory(values)
         await (update.message.reply_text if update.message else update.callback_query.message.reply_text)(
-            f"🌟 *{MESSAGES['register_thanks'].format(company=row[1])}* 🌟",
+            f"🌟 *{MESSAGES['register_thanks'].format(company=values[1])}* 🌟",
             parse_mode="Markdown"
         )
         await show_options(update, context)
@@ -614,7 +2225,7 @@ async def handle_reply(update: Update, context: ContextTypes.DEFAULT_TYPE):
         del context.user_data["network_search"]
     elif context.user_data.get("collab_step"):
         company = context.user_data["collab_company"]
-        collab_sheet.append_row([str(chat_id), company, text, datetime.now().isoformat()])
+        add_connection(chat_id, company, text)
         await context.bot.send_message(
             MANAGER_CHAT_ID,
             f"Collaboration proposal for {company}:\n{text}\nFrom user {chat_id}",
@@ -631,20 +2242,25 @@ async def handle_reply(update: Update, context: ContextTypes.DEFAULT_TYPE):
             rating = int(text)
             if 1 <= rating <= 5:
                 company = context.user_data["rate_company"]
-                collab_sheet.append_row([str(chat_id), company, f"Rating: {rating}", datetime.now().isoformat()])
+                add_connection(chat_id, company, f"Rating: {rating}")
                 keyboard = [[InlineKeyboardButton("🔙 Back to Networking", callback_data="cmd:networking")]]
                 await update.message.reply_text(
                     f"🌟 *{MESSAGES['survey_thanks']}* 🌟", 
                     parse_mode="Markdown", reply_markup=InlineKeyboardMarkup(keyboard))
-                # Award badge for 5 connections
-                user_connections = len([r for r in collab_sheet.get_all_records() if r["ChatID"] == str(chat_id)])
-                if user_connections >= 5:
-                    user_row = users_sheet.find(str(chat_id), in_column=1)
-                    if user_row:
-                        users_sheet.update_cell(user_row.row, 8, "Connector")
-                        await update.message.reply_text(
-                            f"🌟 *{MESSAGES['network_badge'].format(badge='Connector')}* 🌟", 
-                            parse_mode="Markdown")
+                # Award badge once the user has enough connections
+                if str(chat_id) not in badge_awarded and \
+                        await get_connection_count(chat_id) >= CONNECTOR_BADGE_MIN_CONNECTIONS:
+                    try:
+                        user_row = await users_sheet.find(str(chat_id), in_column=1)
+                        if user_row:
+                            if (await users_sheet.cell(user_row.row, 8)).value != CONNECTOR_BADGE:
+                                await users_sheet.update_cell(user_row.row, 8, CONNECTOR_BADGE)
+                                await update.message.reply_text(
+                                    f"🌟 *{MESSAGES['network_badge'].format(badge=CONNECTOR_BADGE)}* 🌟", 
+                                    parse_mode="Markdown")
+                            badge_awarded.add(str(chat_id))  # only once the badge is in the sheet
+                    except Exception as e:
+                        print(f"Badge award error: {str(e)}")  # retried on the next rating
             else:
                 await update.message.reply_text(
                     "Please enter a number between 1 and 5.", 
@@ -677,6 +2293,50 @@ async def handle_reply(update: Update, context: ContextTypes.DEFAULT_TYPE):
             parse_mode="Markdown", reply_markup=InlineKeyboardMarkup(keyboard))
         del context.user_data["suggest_cat"]
 
+async def subscribe_news(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    query = update.callback_query
+    chat_id = str(query.message.chat_id)
+    keyboard = [[InlineKeyboardButton("🔙 Back to Main Menu", callback_data="cmd:main_menu")]]
+    if chat_id in await news_subscribers():
+        text = MESSAGES["already_subscribed"]
+        keyboard.insert(0, [InlineKeyboardButton("Unsubscribe", callback_data="news:unsubscribe")])
+    else:
+        set_subscription(chat_id, "Subscribed")
+        text = MESSAGES["subscribed"]
+    await query.edit_message_text(f"🌟 *{text}* 🌟", parse_mode="Markdown", reply_markup=InlineKeyboardMarkup(keyboard))
+
+async def unsubscribe_news(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    query = update.callback_query
+    set_subscription(query.message.chat_id, "Unsubscribed")
+    keyboard = [[InlineKeyboardButton("🔙 Back to Main Menu", callback_data="cmd:main_menu")]]
+    await query.edit_message_text(
+        f"🌟 *{MESSAGES['unsubscribed']}* 🌟", parse_mode="Markdown", reply_markup=InlineKeyboardMarkup(keyboard))
+
+async def broadcast(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    # /broadcast <announcement>, manager only
+    if update.effective_user.id != int(MANAGER_CHAT_ID):
+        await update.message.reply_text("⚠️ Manager access only.", parse_mode="Markdown")
+        return
+    text = update.message.text.partition(" ")[2].strip()
+    if not text:
+        await update.message.reply_text(MESSAGES["broadcast_usage"])
+        return
+    subscribers = await news_subscribers()
+    current = broadcast_state["current"]
+    if current:
+        await update.message.reply_text(MESSAGES["broadcast_running"].format(
+            done=current["delivered"] + current["failed"], total=current["total"]))
+        return
+    broadcast_state["current"] = {"text": text, "started": datetime.now().isoformat(), "cursor": "",
+                                  "delivered": 0, "failed": 0, "total": len(subscribers)}
+    try:
+        await broadcast_sheet.update_row(1, BROADCAST_COLUMNS)
+    except Exception as e:
+        print(f"Broadcast progress save error: {str(e)}")
+    await save_broadcast_progress()
+    await update.message.reply_text(MESSAGES["broadcast_started"].format(total=len(subscribers)))
+    spawn_task(run_broadcast(context.bot))
+
 async def ask(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.edit_message_text(
@@ -688,26 +2348,18 @@ async def ask(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def handle_ask(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if context.user_data.get("asking"):
         question = update.message.text
+        placeholder = None
         try:
-            headers = {
-                "Authorization": f"Bearer {HF_API_KEY}",
-                "Content-Type": "application/json"
-            }
-            payload = {
-                "inputs": f"You are a helpful AI for startup founders. {question}",
-                "parameters": {
-                    "max_new_tokens": 200,
-                    "temperature": 0.7,
-                    "return_full_text": False
-                }
-            }
-            response = requests.post(HF_API_URL, json=payload, headers=headers, timeout=10)
-            response.raise_for_status()
-            answer = response.json()[0]["generated_text"].strip()
+            local = answer_locally(question)
+            answer, source = local if local else (get_cached_answer(question), None)
+            if answer is None:
+                placeholder = await update.message.reply_text("⏳ Thinking...")
+                answer = await answer_question(update.message.chat_id, question, placeholder)
             formatted_answer = (
                 f"🌟 *Your Answer* 🌟\n"
                 f"➡️ *Question:* {question}\n"
                 f"📝 *Answer:* _{answer}_\n"
+                + (f"{source}\n" if source else "") +
                 f"🎉 Powered by BenuBot!"
             )
             keyboard = [
@@ -715,9 +2367,20 @@ async def handle_ask(update: Update, context: ContextTypes.DEFAULT_TYPE):
                  InlineKeyboardButton("🔙 Back to Main Menu", callback_data="cmd:main_menu")]
             ]
             reply_markup = InlineKeyboardMarkup(keyboard)
-            await update.message.reply_text(formatted_answer, parse_mode="Markdown", reply_markup=reply_markup)
+            if placeholder:
+                await placeholder.edit_text(formatted_answer, parse_mode="Markdown", reply_markup=reply_markup)
+            else:
+                await update.message.reply_text(formatted_answer, parse_mode="Markdown", reply_markup=reply_markup)
+        except AskQueueFull:
+            keyboard = [
+                [InlineKeyboardButton("Try Again", callback_data="cmd:ask_again"),
+                 InlineKeyboardButton("🔙 Back to Main Menu", callback_data="cmd:main_menu")]
+            ]
+            await placeholder.edit_text(
+                f"⚠️ {MESSAGES['ask_busy']}", reply_markup=InlineKeyboardMarkup(keyboard))
         except Exception as e:
-            print(f"HF_API error: {str(e)}")
+            if not isinstance(e, CircuitOpen):
+                print(f"HF_API error: {str(e)}")
             error_msg = (
                 f"⚠️ *Oops!* ⚠️\n"
                 f"Sorry, I couldn’t fetch an answer right now.\n"
@@ -728,601 +2391,336 @@ async def handle_ask(update: Update, context: ContextTypes.DEFAULT_TYPE):
                  InlineKeyboardButton("🔙 Back to Main Menu", callback_data="cmd:main_menu")]
             ]
             reply_markup = InlineKeyboardMarkup(keyboard)
-            await update.message.reply_text(error_msg, parse_mode="Markdown", reply_markup=reply_markup)
+            if placeholder:
+                await placeholder.edit_text(error_msg, parse_mode="Markdown", reply_markup=reply_markup)
+            else:
+                await update.message.reply_text(error_msg, parse_mode="Markdown", reply_markup=reply_markup)
         finally:
             del context.user_data["asking"]
 
 async def button(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
- '
-
-System: The error persists because the `global CATEGORIES` declaration in the `button` function's `approve:` handler is still incorrectly placed after the `CATEGORIES.append(reg_data["category"])` operation. Python requires `global` declarations to come before any use of the variable in the function scope. Let’s fix this by ensuring `global CATEGORIES` is declared at the start of the category approval block in the `button` function.
-
-### Fix
-We’ll update the `button` function in `bot.py` to move `global CATEGORIES` before the append operation in the `approve:` handler for category approvals. Since this is an update to the existing `bot.py`, we’ll reuse the `artifact_id` (`464bae0e-867e-4379-b630-d81cdfd1367c`). Only the `button` function is modified to keep the response focused.
-
-#### Changes Made
-1. In the `button` function, under the `approve:` handler, move `global CATEGORIES` to the start of the category approval block (before `CATEGORIES.append(reg_data["category"])`).
-2. Ensure the rest of the function remains unchanged to preserve existing functionality.
-
-#### Commit Message
-```
-git commit -m "Fix SyntaxError in button approve handler by placing global CATEGORIES before append"
-```
-
-#### Updated Code
-Below is the corrected `bot.py` with the updated `button` function. The rest of the code is unchanged but included for completeness, as the artifact requires the full file.
-
-<xaiArtifact artifact_id="464bae0e-867e-4379-b630-d81cdfd1367c" artifact_version_id="b04936fe-7579-4425-af0d-9a1ea85d0cb0" title="bot.py" contentType="text/python">
-import os
-import json
-import requests
-import re
-from datetime import datetime
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import Application, CommandHandler, ContextTypes, MessageHandler, filters, CallbackQueryHandler
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-import telegram.error
-
-# Initialize bot data
-def init_bot_data(context):
-    if "pending_registrations" not in context.bot_data:
-        context.bot_data["pending_registrations"] = {}
-    if "network_page" not in context.bot_data:
-        context.bot_data["network_page"] = {}
-
-# Google Sheets setup
-scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-creds_json_raw = os.environ.get("GOOGLE_CREDENTIALS", "{}")
-creds_json = json.loads(creds_json_raw)
-creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_json, scope)
-client = gspread.authorize(creds)
-sheet = client.open("BenuBotData")
-training_sheet = sheet.worksheet("TrainingSignups")
-network_sheet = sheet.worksheet("NetworkingRegistrations")
-users_sheet = sheet.worksheet("Users")
-collab_sheet = sheet.worksheet("Collaborations")
-companies_sheet = sheet.worksheet("Companies")
-
-# Scheduler for notifications
-scheduler = AsyncIOScheduler()
-scheduler.start()
-
-# Manager’s Telegram ID
-MANAGER_CHAT_ID = "499281665"
-
-# Hugging Face API setup
-HF_API_KEY = os.environ.get("HF_API_KEY")
-HF_API_URL = "https://api-inference.huggingface.co/models/mistralai/Mistral-7B-Instruct-v0.1"
-
-# Training data
-UPCOMING_TRAININGS = [
-    {"name": "Biscuit Production Basics", "date": "2025-04-15", "resources": None},
-    {"name": "Marketing for Startups", "date": "2025-04-20", "resources": None},
-]
-PAST_TRAININGS = [
-    {
-        "name": "Intro to Fortification",
-        "date": "2025-03-10",
-        "video": "https://youtube.com/example",
-        "resources": "https://drive.google.com/example",
-        "description": "Learn the basics of fortifying biscuits with nutrients."
-    },
-    {
-        "name": "Biscuit Processing Techniques",
-        "date": "2025-03-20",
-        "video": "https://youtu.be/Q9TCM89oNfU?si=5Aia87X1csYSZ4g6",
-        "resources": "https://drive.google.com/file/d/1HTr62gOcWHEU76-OXDnzJRf11l7nXKPv/view",
-        "description": "Techniques for efficient biscuit production."
-    },
-]
-TRAINING_MODULES = [
-    {
-        "id": 1,
-        "name": "Biscuit Production Basics",
-        "content": "Learn the essentials of biscuit production: ingredients, equipment, and quality control.",
-        "prereq": [],
-        "quiz": [
-            {"q": "What’s a key ingredient in biscuits?", "options": ["Sugar", "Salt", "Water"], "answer": "Sugar", "explain": "Sugar is key for flavor and texture in biscuits."},
-            {"q": "What equipment is vital for mixing?", "options": ["Oven", "Mixer", "Scale"], "answer": "Mixer", "explain": "A mixer ensures uniform dough consistency."},
-            {"q": "What ensures product consistency?", "options": ["Taste", "Quality Control", "Packaging"], "answer": "Quality Control", "explain": "Quality control checks standards at every step."}
-        ]
-    },
-    {
-        "id": 2,
-        "name": "Marketing for Startups",
-        "content": "Understand branding, target markets, and low-cost promotion strategies.",
-        "prereq": [1],
-        "quiz": [
-            {"q": "What defines your brand?", "options": ["Logo", "Values", "Price"], "answer": "Values", "explain": "Values shape your brand’s identity and customer trust."},
-            {"q": "Who is your target market?", "options": ["Everyone", "Specific Group", "Competitors"], "answer": "Specific Group", "explain": "A specific group helps tailor your marketing effectively."},
-            {"q": "What’s a low-cost promotion?", "options": ["TV Ads", "Social Media", "Billboards"], "answer": "Social Media", "explain": "Social media reaches audiences cheaply."}
-        ]
-    },
-    {
-        "id": 3,
-        "name": "Financial Planning",
-        "content": "Basics of budgeting, cash flow, and securing startup funds.",
-        "prereq": [1, 2],
-        "quiz": [
-            {"q": "What tracks income vs. expenses?", "options": ["Budget", "Loan", "Sales"], "answer": "Budget", "explain": "A budget plans your financial resources."},
-            {"q": "What’s key to cash flow?", "options": ["Profit", "Timing", "Debt"], "answer": "Timing", "explain": "Timing ensures money is available when needed."},
-            {"q": "Where can startups get funds?", "options": ["Friends", "Investors", "Savings"], "answer": "Investors", "explain": "Investors provide capital for growth."}
-        ]
-    }
-]
+    await query.answer()
+    data = query.data
+    chat_id = query.message.chat_id
+    init_bot_data(context)
 
-# Categories (Benu-specific)
-CATEGORIES = [
-    "Biscuit Production", "Grain Processing", "Food Packaging",
-    "Agricultural Supply", "Marketing & Sales", "Logistics & Distribution", "Other"
-]
+    if data == "reg:personal":
+        context.user_data.clear()
+        context.user_data["personal_step"] = "name"
+        context.user_data["personal_data"] = {"Industries": []}
+        keyboard = [[InlineKeyboardButton("🔙 Cancel", callback_data="cmd:cancel")]]
+        await query.edit_message_text(
+            f"🌟 *{MESSAGES['personal_name']}* 🌟",
+            parse_mode="Markdown", reply_markup=InlineKeyboardMarkup(keyboard))
+    elif data == "reg:company":
+        context.user_data.clear()
+        await register(update, context)
+    elif data.startswith("ind:"):
+        industry = data.split("ind:")[1]
+        personal_data = context.user_data.setdefault("personal_data", {"Industries": []})
+        if industry == "done":
+            context.user_data["personal_step"] = "confirm"
+            keyboard = [
+                [InlineKeyboardButton("Done", callback_data="confirm:done"),
+                 InlineKeyboardButton("Modify", callback_data="confirm:modify"),
+                 InlineKeyboardButton("🔙 Cancel", callback_data="cmd:cancel")]
+            ]
+            await query.edit_message_text(
+                MESSAGES["confirm_personal"].format(
+                    name=personal_data.get("Name", ""),
+                    phone=personal_data.get("Phone", ""),
+                    email=personal_data.get("Email", ""),
+                    industries=", ".join(personal_data["Industries"])
+                ),
+                parse_mode="Markdown", reply_markup=InlineKeyboardMarkup(keyboard))
+        elif industry == "Other":
+            context.user_data["personal_step"] = "other_industry"
+            keyboard = [[InlineKeyboardButton("🔙 Cancel", callback_data="cmd:cancel")]]
+            await query.edit_message_text(
+                f"🌟 *{MESSAGES['other_industry']}* 🌟",
+                parse_mode="Markdown", reply_markup=InlineKeyboardMarkup(keyboard))
+        else:
+            if industry not in personal_data["Industries"]:
+                personal_data["Industries"].append(industry)
+            keyboard = [[InlineKeyboardButton(cat, callback_data=f"ind:{cat}")] for cat in CATEGORIES]
+            keyboard.append([InlineKeyboardButton("Done", callback_data="ind:done")])
+            keyboard.append([InlineKeyboardButton("🔙 Cancel", callback_data="cmd:cancel")])
+            await query.edit_message_text(
+                f"🌟 *{MESSAGES['cat_added'].format(cat=industry)}* 🌟",
+                parse_mode="Markdown", reply_markup=InlineKeyboardMarkup(keyboard))
+    elif data == "cat:add":
+        if query.from_user.id != int(MANAGER_CHAT_ID):
+            await query.edit_message_text("⚠️ Manager access only.", parse_mode="Markdown")
+            return
+        context.user_data["suggest_cat"] = True
+        keyboard = [[InlineKeyboardButton("🔙 Back to Networking", callback_data="cmd:networking")]]
+        await query.edit_message_text(
+            f"🌟 *{MESSAGES['network_suggest_cat']}* 🌟",
+            parse_mode="Markdown", reply_markup=InlineKeyboardMarkup(keyboard))
+    elif data == "cat:remove":
+        if query.from_user.id != int(MANAGER_CHAT_ID):
+            await query.edit_message_text("⚠️ Manager access only.", parse_mode="Markdown")
+            return
+        keyboard = [[InlineKeyboardButton(f"Remove {cat}", callback_data=f"catdel:{cat}")]
+                    for cat in CATEGORIES if cat != "Other"]
+        keyboard.append([InlineKeyboardButton("🔙 Back to Networking", callback_data="cmd:networking")])
+        await query.edit_message_text(
+            "🌟 *Select a category to remove* 🌟",
+            parse_mode="Markdown", reply_markup=InlineKeyboardMarkup(keyboard))
+    elif data.startswith("catdel:"):
+        if query.from_user.id != int(MANAGER_CHAT_ID):
+            await query.edit_message_text("⚠️ Manager access only.", parse_mode="Markdown")
+            return
+        category = data.split("catdel:")[1]
+        if category in CATEGORIES and category != "Other":
+            CATEGORIES.remove(category)
+        keyboard = [[InlineKeyboardButton("🔙 Back to Networking", callback_data="cmd:networking")]]
+        await query.edit_message_text(
+            f"🌟 *Category {category} removed* 🌟",
+            parse_mode="Markdown", reply_markup=InlineKeyboardMarkup(keyboard))
+    elif data.startswith("cat:") and context.user_data.get("register_step") in ("categories", "other_category"):
+        category = data.split("cat:")[1]
+        company_data = context.user_data.setdefault("company_data", {"Categories": []})
+        if category == "done":
+            context.user_data["register_step"] = "public"
+            keyboard = [[InlineKeyboardButton("🔙 Cancel", callback_data="cmd:cancel")]]
+            await query.edit_message_text(
+                f"🌟 *{MESSAGES['public_prompt']}* 🌟",
+                parse_mode="Markdown", reply_markup=InlineKeyboardMarkup(keyboard))
+        elif category == "Other":
+            context.user_data["register_step"] = "other_category"
+            keyboard = [[InlineKeyboardButton("🔙 Cancel", callback_data="cmd:cancel")]]
+            await query.edit_message_text(
+                f"🌟 *{MESSAGES['other_category']}* 🌟",
+                parse_mode="Markdown", reply_markup=InlineKeyboardMarkup(keyboard))
+        else:
+            context.user_data["register_step"] = "categories"
+            if category not in company_data["Categories"]:
+                company_data["Categories"].append(category)
+            keyboard = [[InlineKeyboardButton(cat, callback_data=f"cat:{cat}")] for cat in CATEGORIES]
+            keyboard.append([InlineKeyboardButton("Done", callback_data="cat:done")])
+            keyboard.append([InlineKeyboardButton("🔙 Cancel", callback_data="cmd:cancel")])
+            await query.edit_message_text(
+                f"🌟 *{MESSAGES['cat_added'].format(cat=category)}* 🌟",
+                parse_mode="Markdown", reply_markup=InlineKeyboardMarkup(keyboard))
+    elif data.startswith("cat:"):
+        await network_list(update, context, category=data.split("cat:")[1])
+    elif data == "confirm:done":
+        reg_date = datetime.now().isoformat()
+        reg_id = f"{chat_id}_{reg_date}"
+        if context.user_data.get("personal_step") == "confirm":
+            personal_data = context.user_data["personal_data"]
+            users_sheet.queue_append([
+                str(chat_id), personal_data["Name"], personal_data["Phone"], personal_data["Email"],
+                ",".join(personal_data["Industries"]), reg_date, "Pending"
+            ])
+            set_approval_status("users", chat_id, "Pending")
+            context.bot_data["pending_registrations"][reg_id] = {
+                "chat_id": str(chat_id), "type": "users", "reg_date": reg_date}
+            summary = (f"New personal registration:\nName: {personal_data['Name']}\n"
+                       f"Phone: {personal_data['Phone']}\nEmail: {personal_data['Email']}\n"
+                       f"Industries: {', '.join(personal_data['Industries'])}")
+        elif context.user_data.get("register_step") == "confirm" and context.user_data.get("edit_mode"):
+            company_data = context.user_data["company_data"]
+            await lookup_profile(chat_id)  # refreshes the row number and header
+            row = approval_index["rows"]["companies"].get(str(chat_id))
+            header = approval_index["headers"]["companies"]
+            fields = dict(company_data, Categories=",".join(company_data["Categories"]))
+            cells = [(row, header.index(field) + 1, fields[field])
+                     for field in ("Company", "Phone", "Email", "Description", "Manager", "Categories", "PublicEmail")
+                     if field in header]
+            keyboard = [[InlineKeyboardButton("🔙 Back to Networking", callback_data="cmd:networking")]]
+            if not row or not cells:
+                await query.edit_message_text(
+                    "⚠️ Your profile can’t be updated right now. Please try again later.",
+                    parse_mode="Markdown", reply_markup=InlineKeyboardMarkup(keyboard))
+                return
+            await companies_sheet.update_cells(cells)
+            # Keep the directory listing in step with the edited profile
+            async with network_sheet.flush_lock:
+                sheet_row, doc_id = await registration_row(chat_id)
+                if sheet_row:
+                    network_data = await get_directory()
+                    entry = dict(network_data[doc_id], **fields)
+                    await network_sheet.update_row(sheet_row, [str(entry.get(column, "")) for column in NETWORK_COLUMNS])
+                update_directory_profile(chat_id, company_data)
+            context.user_data.clear()
+            await query.edit_message_text(
+                f"🌟 *{MESSAGES['profile_updated']}* 🌟",
+                parse_mode="Markdown", reply_markup=InlineKeyboardMarkup(keyboard))
+            return
+        elif context.user_data.get("register_step") == "confirm":
+            company_data = context.user_data["company_data"]
+            companies_sheet.queue_append([
+                str(chat_id), company_data["Company"], company_data["Phone"], company_data["Email"],
+                company_data["Description"], company_data["Manager"], ",".join(company_data["Categories"]),
+                reg_date, company_data["PublicEmail"], "Pending"
+            ])
+            set_approval_status("companies", chat_id, "Pending")
+            context.bot_data["pending_registrations"][reg_id] = {
+                "chat_id": str(chat_id), "type": "companies", "reg_date": reg_date}
+            summary = (f"New company registration:\nCompany: {company_data['Company']}\n"
+                       f"Phone: {company_data['Phone']}\nEmail: {company_data['Email']}\n"
+                       f"Description: {company_data['Description']}\nManager: {company_data['Manager']}\n"
+                       f"Categories: {', '.join(company_data['Categories'])}")
+        else:
+            await query.edit_message_text("⚠️ Nothing to confirm. Use /start to begin.", parse_mode="Markdown")
+            return
+        await context.bot.send_message(
+            MANAGER_CHAT_ID,
+            summary,
+            reply_markup=InlineKeyboardMarkup([
+                [InlineKeyboardButton("✅ Approve", callback_data=f"approve:{reg_id}"),
+                 InlineKeyboardButton("❌ Reject", callback_data=f"reject:{reg_id}")]
+            ])
+        )
+        context.user_data.clear()
+        await query.edit_message_text(f"🌟 *{MESSAGES['registration_submitted']}* 🌟", parse_mode="Markdown")
+    elif data == "confirm:modify":
+        keyboard = [[InlineKeyboardButton("🔙 Cancel", callback_data="cmd:cancel")]]
+        if context.user_data.get("personal_step"):
+            context.user_data["personal_step"] = "name"
+            context.user_data["personal_data"] = {"Industries": []}
+            prompt = MESSAGES["personal_name"]
+        else:
+            context.user_data["register_step"] = "company"
+            context.user_data.setdefault("company_data", {})["Categories"] = []
+            prompt = MESSAGES["company_prompt"]
+        await query.edit_message_text(
+            f"🌟 *{MESSAGES['modify_prompt']}* 🌟\n{prompt}",
+            parse_mode="Markdown", reply_markup=InlineKeyboardMarkup(keyboard))
+    elif data.startswith("approve:") or data.startswith("reject:"):
+        if query.from_user.id != int(MANAGER_CHAT_ID):
+            await query.edit_message_text("⚠️ Manager access only.", parse_mode="Markdown")
+            return
+        action, reg_id = data.split(":", 1)
+        reg_data = context.bot_data["pending_registrations"].pop(reg_id, None)
+        if not reg_data:
+            await query.edit_message_text("⚠️ This request was already handled or has expired.", parse_mode="Markdown")
+            return
+        approved = action == "approve"
+        if reg_data["type"] == "category":
+            category = reg_data["category"]
+            if approved and category not in CATEGORIES:
+                CATEGORIES.insert(len(CATEGORIES) - 1, category)  # "Other" stays last
+            await context.bot.send_message(
+                reg_data["chat_id"],
+                f"🌟 *Category {category} {'approved' if approved else 'not approved'}* 🌟",
+                parse_mode="Markdown")
+        else:
+            kind, status = reg_data["type"], "Approved" if approved else "Rejected"
+            worksheet = PROFILE_SHEETS[kind]
+            await worksheet.flush()  # the registration row may still be queued
+            await lookup_profile(reg_data["chat_id"])
+            row = approval_index["rows"][kind].get(reg_data["chat_id"])
+            header = approval_index["headers"][kind]
+            if not row or "Status" not in header:
+                print(f"Approval error: no {kind} row or Status column for {reg_data['chat_id']}")
+                context.bot_data["pending_registrations"][reg_id] = reg_data
+                await query.edit_message_text("⚠️ Couldn’t update the registration. Please try again.", parse_mode="Markdown")
+                return
+            await worksheet.update_cell(row, header.index("Status") + 1, status)
+            set_approval_status(kind, reg_data["chat_id"], status)
+            await context.bot.send_message(
+                reg_data["chat_id"],
+                f"🌟 *{MESSAGES['registration_approved' if approved else 'registration_rejected']}* 🌟",
+                parse_mode="Markdown")
+        await query.edit_message_text(f"{query.message.text}\n\n{'✅ Approved' if approved else '❌ Rejected'}")
+    elif data == "cmd:cancel":
+        await cancel_registration(update, context)
+    elif data == "cmd:main_menu":
+        await show_options(update, context)
+    elif data in ("cmd:ask", "cmd:ask_again"):
+        await ask(update, context)
+    elif data == "cmd:networking":
+        await networking(update, context)
+    elif data == "cmd:register":
+        await register(update, context)
+    elif data == "cmd:subscribenews":
+        await subscribe_news(update, context)
+    elif data == "news:unsubscribe":
+        await unsubscribe_news(update, context)
+    elif data == "cmd:update_profile":
+        await network_edit(update, context)
+    elif data == "cmd:resources":
+        sections = [f"📚 *{training['name']}*\n{training['resources']}"
+                    for training in PAST_TRAININGS if training.get("resources")]
+        text = f"🌟 *{MESSAGES['resources_title']}* 🌟\n\n" + ("\n\n".join(sections) or MESSAGES["no_resources"])
+        keyboard = [[InlineKeyboardButton("🔙 Back to Main Menu", callback_data="cmd:main_menu")]]
+        await query.edit_message_text(text, parse_mode="Markdown", reply_markup=InlineKeyboardMarkup(keyboard))
+    elif data == "cmd:training_events":
+        upcoming = [f"📅 *{training['name']}* ({training['date']})" for training in UPCOMING_TRAININGS]
+        past = [f"🎥 *{training['name']}* ({training['date']})\n_{training['description']}_\nVideo: {training['video']}"
+                for training in PAST_TRAININGS]
+        text = (f"🌟 *{MESSAGES['trainings_upcoming']}* 🌟\n" + "\n".join(upcoming) +
+                f"\n\n🌟 *{MESSAGES['trainings_past']}* 🌟\n" + "\n\n".join(past))
+        keyboard = [[InlineKeyboardButton("🔙 Back to Main Menu", callback_data="cmd:main_menu")]]
+        await query.edit_message_text(text, parse_mode="Markdown", reply_markup=InlineKeyboardMarkup(keyboard))
+    elif data == "cmd:learn_startup_skills":
+        sections = [MESSAGES["module_study"].format(name=module["name"], content=module["content"])
+                    for module in TRAINING_MODULES]
+        text = f"🌟 *{MESSAGES['modules_title']}* 🌟\n\n" + "\n\n".join(sections)
+        keyboard = [[InlineKeyboardButton("🔙 Back to Main Menu", callback_data="cmd:main_menu")]]
+        await query.edit_message_text(text, parse_mode="Markdown", reply_markup=InlineKeyboardMarkup(keyboard))
+    elif data == "cmd:news":
+        latest = broadcast_state["current"]["text"] if broadcast_state["current"] else None
+        if latest is None:
+            try:
+                latest = (await broadcast_sheet.row_values(2) or [None])[0]
+            except Exception as e:
+                print(f"News error: {str(e)}")
+        text = f"🌟 *{MESSAGES['news_title']}* 🌟\n\n{latest or 'No announcements yet.'}"
+        keyboard = [[InlineKeyboardButton("🔙 Back to Main Menu", callback_data="cmd:main_menu")]]
+        await query.edit_message_text(text, reply_markup=InlineKeyboardMarkup(keyboard))
+    elif data == "cmd:contact":
+        keyboard = [[InlineKeyboardButton("🔙 Back to Main Menu", callback_data="cmd:main_menu")]]
+        await query.edit_message_text(
+            f"🌟 *{MESSAGES['contact_info']}* 🌟", parse_mode="Markdown", reply_markup=InlineKeyboardMarkup(keyboard))
+    elif data == "network:category":
+        await network_category(update, context)
+    elif data == "network:search":
+        await network_search(update, context)
+    elif data == "network:edit":
+        await network_edit(update, context)
+    elif data == "network:event":
+        await network_event(update, context)
+    elif data == "network:refer":
+        await network_refer(update, context)
+    elif data == "network:stats":
+        await network_stats(update, context)
+    elif data == "network:compact":
+        await network_compact(update, context)
+    elif data == "network:manage_cat":
+        await network_manage_cat(update, context)
+    elif data.startswith("page:"):
+        await network_page(update, context)
+    elif data.startswith("connect:"):
+        await network_connect(update, context)
+    elif data.startswith("collab:"):
+        await network_collab(update, context)
+    elif data.startswith("rate:"):
+        await network_rate(update, context)
+    else:
+        print(f"Unknown callback data: {data}")
+
+def main():
+    token = os.environ["TELEGRAM_TOKEN"]
+    application = Application.builder().token(token).post_init(post_init).post_shutdown(post_shutdown).build()
+    application.add_handler(CommandHandler("start", start))
+    application.add_handler(CommandHandler("broadcast", broadcast))
+    application.add_handler(CallbackQueryHandler(button))
+    application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_reply))
+    webhook_url = os.environ.get("WEBHOOK_URL")
+    if webhook_url:
+        application.run_webhook(
+            listen="0.0.0.0",
+            port=int(os.environ.get("PORT", "8443")),
+            url_path=token,
+            webhook_url=f"{webhook_url.rstrip('/')}/{token}"
+        )
+    else:
+        application.run_polling()
 
-# Messages
-MESSAGES = {
-    "welcome": "Welcome to Benu’s Startup Support Bot!\nPlease select your purpose:",
-    "options": "Choose an option:",
-    "ask": "Ask a question",
-    "resources": "Access training resources",
-    "training_events": "Training Events",
-    "networking": "Join the network",
-    "news": "Latest updates",
-    "contact": "Reach us",
-    "subscribenews": "News updates",
-    "learn_startup_skills": "Learn Startup Skills",
-    "update_profile": "Update Profile",
-    "ask_prompt": "Please type your question, and I’ll get an answer for you!",
-    "ask_error": "Sorry, I’m having trouble answering right now. Try again later!",
-    "resources_title": "Available Training Resources:",
-    "no_resources": "No resources available yet.",
-    "trainings_past": "Past Training Events:",
-    "trainings_upcoming": "Upcoming Training Events:",
-    "signup_prompt": "Please provide your full name:",
-    "survey_company_size": "What’s your company size? (e.g., Small, Medium, Large):",
-    "networking_title": "Network by Category (Biscuit & Agriculture Sector):",
-    "register_prompt": "Please provide your company name (Step 1/7):",
-    "news_title": "Latest Announcements:",
-    "contact_info": "Contact Us:\nEmail: benu@example.com\nPhone: +251921756683\nAddress: Addis Ababa, Bole Sub city, Woreda 03, H.N. 4/10/A5/FL8",
-    "subscribed": "Subscribed to news updates!",
-    "signup_thanks": "Thanks for signing up, {name}!",
-    "register_thanks": "Registered {company} in the network!",
-    "phone_prompt": "Please provide your phone number (Step {step}/{total}):",
-    "email_prompt": "Please provide your email (Step {step}/{total}):",
-    "company_prompt": "Please provide your company name (Step 1/7):",
-    "description_prompt": "Please provide a description of what your company does (Step 4/7):",
-    "manager_prompt": "Please provide the manager’s name (Step 5/7):",
-    "categories_prompt": "Select categories (Step 6/7, click Done when finished):",
-    "public_prompt": "Share email publicly? (Step 7/7, reply Yes/No):",
-    "cat_added": "Added {cat}. Select more or click Done:",
-    "other_industry": "Please enter your custom industry:",
-    "other_category": "Please enter your custom category:",
-    "confirm_personal": "Please review your information:\nName: {name}\nPhone: {phone}\nEmail: {email}\nIndustries: {industries}\nIs this correct?",
-    "confirm_company": "Please review your information:\nCompany: {company}\nPhone: {phone}\nEmail: {email}\nDescription: {description}\nManager: {manager}\nCategories: {categories}\nPublic Email: {public}\nIs this correct?",
-    "modify_prompt": "Which information would you like to modify?",
-    "modules_title": "Startup Skills Modules:",
-    "module_study": "Study: {name}\n{content}",
-    "quiz_start": "Test your knowledge for {name}:",
-    "quiz_question": "Q{num}: {q}",
-    "quiz_correct": "Correct!\nExplanation: {explain}",
-    "quiz_wrong": "Wrong. The answer was {answer}.\nExplanation: {explain}",
-    "quiz_done": "Quiz complete! Score: {score}/{total}. Next module unlocked.",
-    "prereq_error": "Please complete the previous module(s) first.",
-    "profile_prompt": "Select what to update:",
-    "profile_name": "New name:",
-    "profile_phone": "New phone:",
-    "profile_email": "New email:",
-    "profile_company": "New company:",
-    "profile_updated": "Profile updated!",
-    "survey_satisfaction": "How satisfied are you with the training? (1-5):",
-    "survey_thanks": "Thank you for your feedback!",
-    "network_search": "Search by keyword (e.g., company name):",
-    "network_connect": "Request connection with {company}:",
-    "network_event": "Join Networking Event (May 15, 2025):",
-    "network_collab": "Propose collaboration with {company}:",
-    "network_edit": "Edit your company profile:",
-    "network_stats": "Network Stats:\n{stats}",
-    "network_badge": "🎉 You earned the {badge} badge!",
-    "network_invalid_email": "Invalid email format. Please use example@domain.com.",
-    "network_invalid_phone": "Invalid phone format. Please use +2519xxxxxxxx.",
-    "network_suggest_cat": "Suggest a new category:",
-    "network_cat_added": "Category {cat} suggested for approval.",
-    "network_rate": "Rate your connection with {company} (1-5):",
-    "network_refer": "Invite a startup to join the network:",
-    "network_showcase": "Startup of the Month: {company}\n{description}",
-    "personal_name": "Please provide your full name (Step 1/4):",
-    "personal_industry": "Select your industry of interest (Step 4/4):",
-    "registration_submitted": "Approval requested. You’ll be notified soon!",
-    "registration_approved": "Your registration has been approved! Welcome!",
-    "registration_rejected": "Your registration was not approved. Please contact support."
-}
-
-# Bot functions
-async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    context.user_data.clear()  # Clear any previous data
-    keyboard = [
-        [InlineKeyboardButton("Personal", callback_data="reg:personal"),
-         InlineKeyboardButton("Company", callback_data="reg:company")]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
-    await update.message.reply_text(
-        "🌟 *Welcome to Benu’s Startup Support Bot!* 🌟\nPlease select your purpose:",
-        reply_markup=reply_markup,
-        parse_mode="Markdown"
-    )
-
-async def show_options(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    chat_id = str(update.callback_query.message.chat_id)
-    # Check approval status
-    user_row = users_sheet.find(chat_id, in_column=1)  # ChatID column
-    company_row = companies_sheet.find(chat_id, in_column=1)  # ChatID column
-    if (user_row and users_sheet.cell(user_row.row, 7).value == "Approved") or \
-       (company_row and companies_sheet.cell(company_row.row, 10).value == "Approved"):
-        keyboard = [
-            [InlineKeyboardButton(MESSAGES["ask"], callback_data="cmd:ask"),
-             InlineKeyboardButton(MESSAGES["resources"], callback_data="cmd:resources")],
-            [InlineKeyboardButton(MESSAGES["training_events"], callback_data="cmd:training_events"),
-             InlineKeyboardButton(MESSAGES["networking"], callback_data="cmd:networking")],
-            [InlineKeyboardButton(MESSAGES["news"], callback_data="cmd:news"),
-             InlineKeyboardButton(MESSAGES["contact"], callback_data="cmd:contact")],
-            [InlineKeyboardButton(MESSAGES["subscribenews"], callback_data="cmd:subscribenews"),
-             InlineKeyboardButton(MESSAGES["learn_startup_skills"], callback_data="cmd:learn_startup_skills")],
-            [InlineKeyboardButton(MESSAGES["update_profile"], callback_data="cmd:update_profile")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        await update.callback_query.edit_message_text(
-            f"🌟 *{MESSAGES['options']}* 🌟", 
-            reply_markup=reply_markup, 
-            parse_mode="Markdown"
-        )
-    else:
-        await update.callback_query.edit_message_text(
-            "🌟 *Awaiting approval.* 🌟\nYou’ll see the main menu once approved.",
-            parse_mode="Markdown"
-        )
-
-async def cancel_registration(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    query = update.callback_query
-    context.user_data.clear()
-    keyboard = [
-        [InlineKeyboardButton("Personal", callback_data="reg:personal"),
-         InlineKeyboardButton("Company", callback_data="reg:company")]
-    ]
-    await query.edit_message_text(
-        "🌟 *Registration cancelled. Start over:* 🌟",
-        parse_mode="Markdown", reply_markup=InlineKeyboardMarkup(keyboard)
-    )
-
-async def networking(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    query = update.callback_query
-    chat_id = query.message.chat_id
-    context.bot_data["network_page"][str(chat_id)] = 0  # Reset page
-    keyboard = [
-        [InlineKeyboardButton("Browse by Category", callback_data="network:category"),
-         InlineKeyboardButton("Search by Keyword", callback_data="network:search")],
-        [InlineKeyboardButton("Register Company", callback_data="cmd:register"),
-         InlineKeyboardButton("Edit Profile", callback_data="network:edit")],
-        [InlineKeyboardButton("Join Event", callback_data="network:event"),
-         InlineKeyboardButton("Invite Startup", callback_data="network:refer")],
-        [InlineKeyboardButton("🔙 Back to Main Menu", callback_data="cmd:main_menu")]
-    ]
-    if query.from_user.id == int(MANAGER_CHAT_ID):
-        keyboard.insert(0, [InlineKeyboardButton("View Stats", callback_data="network:stats"),
-                            InlineKeyboardButton("Manage Categories", callback_data="network:manage_cat")])
-    await query.message.reply_text(
-        f"🌟 *{MESSAGES['networking_title']}* 🌟", 
-        reply_markup=InlineKeyboardMarkup(keyboard), 
-        parse_mode="Markdown"
-    )
-
-async def network_category(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    query = update.callback_query
-    keyboard = [[InlineKeyboardButton(cat, callback_data=f"cat:{cat}")] for cat in CATEGORIES]
-    keyboard.append([InlineKeyboardButton("🔙 Back to Networking", callback_data="cmd:networking")])
-    await query.edit_message_text(
-        "🌟 *Select a Category* 🌟", 
-        reply_markup=InlineKeyboardMarkup(keyboard), 
-        parse_mode="Markdown"
-    )
-
-async def network_list(update: Update, context: ContextTypes.DEFAULT_TYPE, category=None, search=None):
-    query = update.callback_query
-    chat_id = query.message.chat_id
-    page = context.bot_data["network_page"].get(str(chat_id), 0)
-    network_data = network_sheet.get_all_records()
-    companies = []
-
-    for entry in network_data:
-        if category and category not in entry["Categories"].split(","):
-            continue
-        if search:
-            search_lower = search.lower()
-            if not (search_lower in entry["Company"].lower() or 
-                    search_lower in entry["Description"].lower() or 
-                    search_lower in entry["Manager"].lower()):
-                continue
-        companies.append(entry)
-
-    total = len(companies)
-    per_page = 5
-    start = page * per_page
-    end = start + per_page
-    sections = []
-    for company in companies[start:end]:
-        contact = company["Phone"] if company["PublicEmail"] == "Yes" else "Private"
-        sections.append(
-            f"🏢 *{company['Company']}*\n"
-            f"📝 _{company['Description']}_\n"
-            f"📞 Contact: {contact}\n"
-            f"👤 Manager: {company['Manager']}\n"
-            f"📅 Joined: {company['RegDate']}"
-        )
-
-    text = f"🌟 *Companies (Page {page + 1}/{max(1, (total + per_page - 1) // per_page)})* 🌟\n\n" + "\n🌟----🌟\n".join(sections)
-    keyboard = []
-    if total > per_page:
-        nav = []
-        if page > 0:
-            nav.append(InlineKeyboardButton("⬅️ Previous", callback_data=f"page:{page-1}:{category or ''}:{search or ''}"))
-        if end < total:
-            nav.append(InlineKeyboardButton("Next ➡️", callback_data=f"page:{page+1}:{category or ''}:{search or ''}"))
-        keyboard.append(nav)
-    for company in companies[start:end]:
-        keyboard.append([InlineKeyboardButton(f"Contact {company['Company']}", callback_data=f"connect:{company['Company']}")])
-    keyboard.append([InlineKeyboardButton("🔙 Back to Networking", callback_data="cmd:networking")])
-    await query.edit_message_text(text, parse_mode="Markdown", reply_markup=InlineKeyboardMarkup(keyboard))
-
-async def network_search(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    query = update.callback_query
-    context.user_data["network_search"] = True
-    keyboard = [[InlineKeyboardButton("🔙 Back to Networking", callback_data="cmd:networking")]]
-    await query.edit_message_text(
-        f"🌟 *{MESSAGES['network_search']}* 🌟", 
-        reply_markup=InlineKeyboardMarkup(keyboard), 
-        parse_mode="Markdown"
-    )
-
-async def network_connect(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    query = update.callback_query
-    company = query.data.split("connect:")[1]
-    network_data = network_sheet.get_all_records()
-    entry = next((e for e in network_data if e["Company"] == company), None)
-    if not entry:
-        await query.edit_message_text("⚠️ Company not found.", parse_mode="Markdown")
-        return
-    if entry["PublicEmail"] == "Yes":
-        text = f"🌟 *Contact {company}* 🌟\nEmail: {entry['Email']}\nPhone: {entry['Phone']}"
-    else:
-        text = f"🌟 *Connection Requested* 🌟\nWe’ve notified {company}’s manager."
-        await context.bot.send_message(
-            MANAGER_CHAT_ID,
-            f"Connection request for {company} from user {query.from_user.id}",
-            parse_mode="Markdown"
-        )
-    keyboard = [
-        [InlineKeyboardButton("Rate Connection", callback_data=f"rate:{company}")],
-        [InlineKeyboardButton("🔙 Back to Networking", callback_data="cmd:networking")]
-    ]
-    await query.edit_message_text(text, parse_mode="Markdown", reply_markup=InlineKeyboardMarkup(keyboard))
-
-async def network_event(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    query = update.callback_query
-    keyboard = [[InlineKeyboardButton("🔙 Back to Networking", callback_data="cmd:networking")]]
-    await query.edit_message_text(
-        f"🌟 *{MESSAGES['network_event']}* 🌟\nRegister for the May 15, 2025, networking event!",
-        reply_markup=InlineKeyboardMarkup(keyboard),
-        parse_mode="Markdown"
-    )
-
-async def network_collab(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    query = update.callback_query
-    company = query.data.split("collab:")[1]
-    context.user_data["collab_company"] = company
-    context.user_data["collab_step"] = True
-    keyboard = [[InlineKeyboardButton("🔙 Back to Networking", callback_data="cmd:networking")]]
-    await query.edit_message_text(
-        f"🌟 *{MESSAGES['network_collab'].format(company=company)}* 🌟\nPlease describe your collaboration proposal:",
-        reply_markup=InlineKeyboardMarkup(keyboard),
-        parse_mode="Markdown"
-    )
-
-async def network_edit(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    query = update.callback_query
-    chat_id = query.message.chat_id
-    company_row = companies_sheet.find(str(chat_id), in_column=1)
-    if not company_row:
-        await query.edit_message_text("⚠️ You haven’t registered a company yet.", parse_mode="Markdown")
-        return
-    row = companies_sheet.row_values(company_row.row)
-    context.user_data["register_step"] = "company"
-    context.user_data["edit_mode"] = True
-    context.user_data["company_data"] = {
-        "Company": row[1],
-        "Phone": row[2],
-        "Email": row[3],
-        "Description": row[4],
-        "Manager": row[5],
-        "Categories": row[6].split(",") if row[6] else [],
-        "PublicEmail": row[8],
-        "Status": row[9]
-    }
-    keyboard = [[InlineKeyboardButton("🔙 Cancel", callback_data="cmd:cancel")]]
-    await query.edit_message_text(
-        f"🌟 *{MESSAGES['company_prompt']}* 🌟\nCurrent: {row[1]}",
-        reply_markup=InlineKeyboardMarkup(keyboard),
-        parse_mode="Markdown"
-    )
-
-async def network_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    query = update.callback_query
-    if query.from_user.id != int(MANAGER_CHAT_ID):
-        await query.edit_message_text("⚠️ Manager access only.", parse_mode="Markdown")
-        return
-    network_data = network_sheet.get_all_records()
-    cat_counts = {cat: 0 for cat in CATEGORIES if cat != "Other"}
-    for entry in network_data:
-        for cat in entry["Categories"].split(","):
-            if cat in cat_counts:
-                cat_counts[cat] += 1
-    stats = [f"{cat}: {count} companies" for cat, count in cat_counts.items()]
-    stats.append(f"Total: {len(network_data)} companies")
-    text = MESSAGES["network_stats"].format(stats="\n".join(stats))
-    keyboard = [[InlineKeyboardButton("🔙 Back to Networking", callback_data="cmd:networking")]]
-    await query.edit_message_text(text, parse_mode="Markdown", reply_markup=InlineKeyboardMarkup(keyboard))
-
-async def network_manage_cat(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    query = update.callback_query
-    if query.from_user.id != int(MANAGER_CHAT_ID):
-        await query.edit_message_text("⚠️ Manager access only.", parse_mode="Markdown")
-        return
-    keyboard = [
-        [InlineKeyboardButton("Add Category", callback_data="cat:add"),
-         InlineKeyboardButton("Remove Category", callback_data="cat:remove")],
-        [InlineKeyboardButton("🔙 Back to Networking", callback_data="cmd:networking")]
-    ]
-    await query.edit_message_text(
-        "🌟 *Manage Categories* 🌟", 
-        reply_markup=InlineKeyboardMarkup(keyboard), 
-        parse_mode="Markdown"
-    )
-
-async def network_rate(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    query = update.callback_query
-    company = query.data.split("rate:")[1]
-    context.user_data["rate_company"] = company
-    context.user_data["rate_step"] = True
-    keyboard = [[InlineKeyboardButton("🔙 Back to Networking", callback_data="cmd:networking")]]
-    await query.edit_message_text(
-        f"🌟 *{MESSAGES['network_rate'].format(company=company)}* 🌟", 
-        reply_markup=InlineKeyboardMarkup(keyboard), 
-        parse_mode="Markdown"
-    )
-
-async def network_refer(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    query = update.callback_query
-    chat_id = query.message.chat_id
-    referral_link = f"https://t.me/BenuStartupBot?start=refer_{chat_id}"
-    text = f"🌟 *{MESSAGES['network_refer']}* 🌟\nShare this link: {referral_link}"
-    keyboard = [[InlineKeyboardButton("🔙 Back to Networking", callback_data="cmd:networking")]]
-    await query.edit_message_text(text, parse_mode="Markdown", reply_markup=InlineKeyboardMarkup(keyboard))
-
-async def register(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    chat_id = update.message.chat_id if update.message else update.callback_query.message.chat_id
-    # Check if already registered in Companies
-    company_row = companies_sheet.find(str(chat_id), in_column=1)
-    if company_row and companies_sheet.cell(company_row.row, 10).value == "Approved":
-        row = companies_sheet.row_values(company_row.row)
-        network_sheet.append_row([
-            str(chat_id), row[1], row[2], row[3], row[4], row[5], row[6], row[7], row[8]
-        ])
-        await (update.message.reply_text if update.message else update.callback_query.message.reply_text)(
-            f"🌟 *{MESSAGES['register_thanks'].format(company=row[1])}* 🌟",
-            parse_mode="Markdown"
-        )
-        await show_options(update, context)
-    else:
-        context.user_data["register_step"] = "company"
-        context.user_data["edit_mode"] = False
-        context.user_data["company_data"] = {"Categories": []}
-        keyboard = [[InlineKeyboardButton("🔙 Cancel", callback_data="cmd:cancel")]]
-        await (update.message.reply_text if update.message else update.callback_query.message.reply_text)(
-            f"🌟 *{MESSAGES['company_prompt']}* 🌟", 
-            parse_mode="Markdown", 
-            reply_markup=InlineKeyboardMarkup(keyboard)
-        )
-
-async def handle_reply(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    chat_id = update.message.chat_id
-    text = update.message.text
-
-    if context.user_data.get("asking"):
-        await handle_ask(update, context)
-    elif context.user_data.get("personal_step"):
-        step = context.user_data["personal_step"]
-        personal_data = context.user_data.setdefault("personal_data", {"Industries": []})
-        keyboard = [[InlineKeyboardButton("🔙 Cancel", callback_data="cmd:cancel")]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        if step == "name":
-            personal_data["Name"] = text
-            context.user_data["personal_step"] = "phone"
-            await update.message.reply_text(
-                f"🌟 *{MESSAGES['phone_prompt'].format(step=2, total=4)}* 🌟",
-                parse_mode="Markdown", reply_markup=reply_markup)
-        elif step == "phone":
-            if not re.match(r"\+2519\d{8}$", text):
-                await update.message.reply_text(
-                    f"🌟 *{MESSAGES['network_invalid_phone']}* 🌟", 
-                    parse_mode="Markdown", reply_markup=reply_markup)
-                return
-            personal_data["Phone"] = text
-            context.user_data["personal_step"] = "email"
-            await update.message.reply_text(
-                f"🌟 *{MESSAGES['email_prompt'].format(step=3, total=4)}* 🌟",
-                parse_mode="Markdown", reply_markup=reply_markup)
-        elif step == "email":
-            if not re.match(r"[^@]+@[^@]+\.[^@]+", text):
-                await update.message.reply_text(
-                    f"🌟 *{MESSAGES['network_invalid_email']}* 🌟", 
-                    parse_mode="Markdown", reply_markup=reply_markup)
-                return
-            personal_data["Email"] = text
-            context.user_data["personal_step"] = "industry"
-            keyboard = [[InlineKeyboardButton(cat, callback_data=f"ind:{cat}")] for cat in CATEGORIES]
-            keyboard.append([InlineKeyboardButton("Done", callback_data="ind:done")])
-            keyboard.append([InlineKeyboardButton("🔙 Cancel", callback_data="cmd:cancel")])
-            await update.message.reply_text(
-                f"🌟 *{MESSAGES['personal_industry']}* 🌟", 
-                reply_markup=InlineKeyboardMarkup(keyboard), 
-                parse_mode="Markdown")
-        elif step == "other_industry":
-            if text.strip():
-                personal_data["Industries"].append(text.strip())
-            context.user_data["personal_step"] = "industry"
-            keyboard = [[InlineKeyboardButton(cat, callback_data=f"ind:{cat}")] for cat in CATEGORIES]
-            keyboard.append([InlineKeyboardButton("Done", callback_data="ind:done")])
-            keyboard.append([InlineKeyboardButton("🔙 Cancel", callback_data="cmd:cancel")])
-            await update.message.reply_text(
-                f"🌟 *{MESSAGES['cat_added'].format(cat=text.strip())}* 🌟\nSelect more or click Done:",
-                parse_mode="Markdown", reply_markup=InlineKeyboardMarkup(keyboard))
-    elif context.user_data.get("register_step"):
-        step = context.user_data["register_step"]
-        edit_mode = context.user_data.get("edit_mode", False)
-        company_data = context.user_data.setdefault("company_data", {"Categories": []})
-        keyboard = [[InlineKeyboardButton("🔙 Cancel", callback_data="cmd:cancel")]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        step_count = {"company": 1, "phone": 2, "email": 3, "description": 4, "manager": 5, "categories": 6, "public": 7}
-        total_steps = 7
-        if step == "company":
-            company_data["Company"] = text
-            context.user_data["register_step"] = "phone"
-            await update.message.reply_text(
-                f"🌟 *{MESSAGES['phone_prompt'].format(step=2, total=total_steps)}* 🌟",
-                parse_mode="Markdown", reply_markup=reply_markup)
-        elif step == "phone":
-            if not re.match(r"\+2519\d{8}$", text):
-                await update.message.reply_text(
-                    f"🌟 *{MESSAGES['network_invalid_phone']}* 🌟", 
-                    parse_mode="Markdown", reply_markup=reply_markup)
-                return
-            company_data["Phone"] = text
-            context.user_data["register_step"] = "email"
-            await update.message.reply_text(
-                f"🌟 *{MESSAGES['email_prompt'].format(step=3, total=total_steps)}* 🌟",
-                parse_mode="Markdown", reply_markup=reply_markup)
-        elif step == "email":
-            if not re.match(r"[^@]+@[^@]+\.[^@]+", text):
-                await update.message.reply_text(
-                    f"🌟 *{MESSAGES['network_invalid_email']}* 🌟", 
-                    parse_mode="Markdown", reply_markup=reply_markup)
-                return
-            company_data["Email"] = text
-            context.user_data["register_step"] = "description"
-            await update.message.reply_text(
-                f"🌟 *{MESSAGES['description_prompt']}* 🌟",
-                parse_mode="Markdown", reply_markup=reply_markup)
-        elif step == "description":
-            company_data["Description"] = text
-            context.user_data["register_step"] = "manager"
-            await update.message.reply_text(
-                f
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import bot
+
+
+def make_callback(data, user_id=1, chat_id=1):
+    query = SimpleNamespace(
+        data=data,
+        answer=AsyncMock(),
+        edit_message_text=AsyncMock(),
+        from_user=SimpleNamespace(id=user_id),
+        message=SimpleNamespace(chat_id=chat_id, text="", reply_text=AsyncMock()),
+    )
+    update = SimpleNamespace(callback_query=query, message=None)
+    context = SimpleNamespace(user_data={}, bot_data={}, bot=SimpleNamespace(send_message=AsyncMock()))
+    return update, context
+
+
+def load_directory(records):
+    bot.rebuild_directory_indexes(records)
+    bot.directory_cache["records"] = records
+    bot.directory_cache["loaded_at"] = 1e18  # never expires during a test
+
+
+def test_import_has_entry_points():
+    assert callable(bot.button)
+    assert callable(bot.main)
+    assert bot.AsyncWorksheet.instances and all(ws.worksheet is None for ws in bot.AsyncWorksheet.instances)
+
+
+def test_button_contact():
+    update, context = make_callback("cmd:contact")
+    asyncio.run(bot.button(update, context))
+    update.callback_query.answer.assert_awaited_once()
+    text = update.callback_query.edit_message_text.await_args.args[0]
+    assert "benu@example.com" in text
+
+
+def test_button_register_category_flow():
+    update, context = make_callback("cat:Grain Processing")
+    context.user_data.update(register_step="categories", company_data={"Categories": []})
+    asyncio.run(bot.button(update, context))
+    assert context.user_data["company_data"]["Categories"] == ["Grain Processing"]
+    update.callback_query.data = "cat:done"
+    asyncio.run(bot.button(update, context))
+    assert context.user_data["register_step"] == "public"
+
+
+def test_button_rejects_non_manager_approval():
+    update, context = make_callback("approve:1_2025", user_id=2)
+    context.bot_data["pending_registrations"] = {"1_2025": {"chat_id": "1", "type": "category", "category": "X"}}
+    asyncio.run(bot.button(update, context))
+    assert "1_2025" in context.bot_data["pending_registrations"]
+
+
+def test_duplicate_rows_keeps_newest():
+    keys = ["ChatID", "1", "2", "1", "", "2", "3"]
+    assert bot.duplicate_rows(keys) == [2, 3]
+
+
+def test_search_directory_ranks_company_name_first():
+    load_directory([
+        {"ChatID": "1", "Company": "Sunrise Foods", "Manager": "Abebe", "Description": "biscuits", "Categories": "Biscuit Production"},
+        {"ChatID": "2", "Company": "Grain Co", "Manager": "Sara", "Description": "sunrise grain mill", "Categories": "Grain Processing"},
+    ])
+    assert bot.search_directory("sunrise") == [0, 1]
+    assert bot.search_directory("sun grain") == [1]
+    assert bot.companies_in_category("Grain Processing") == {1}
+    assert bot.search_directory("?!") == [0, 1]
+
+
+def test_first_replica_sync_stores_full_snapshot(monkeypatch, tmp_path):
+    values = [["ChatID", "Company"], ["1", "Sunrise Foods"]]
+    worksheet = SimpleNamespace(name="Companies", flush_generation=0,
+                                refresh_values=AsyncMock(return_value=(values, [])))
+    monkeypatch.setattr(bot, "SQLITE_REPLICA_PATH", str(tmp_path / "replica.db"))
+    monkeypatch.setattr(bot, "replica", {"db": None, "synced": set()})
+    monkeypatch.setattr(bot.AsyncWorksheet, "instances", [worksheet])
+    monkeypatch.setattr(bot, "run_sheets", AsyncMock(side_effect=RuntimeError("offline")))
+    asyncio.run(bot.sync_replica())
+    assert bot.replica_has("Companies")
+    assert bot.replica_values("Companies") == values
+
+
+def api_error(code):
+    error = {"code": code, "message": "error", "status": "ERROR"}
+    return bot.gspread.exceptions.APIError(SimpleNamespace(json=lambda: {"error": error}, text=""))
+
+
+def test_flush_keeps_rows_on_permission_errors(monkeypatch):
+    monkeypatch.setattr(bot.AsyncWorksheet, "instances", [])
+    worksheet = bot.AsyncWorksheet("Users")
+    worksheet.call = AsyncMock(side_effect=api_error(403))
+    worksheet.pending = [["1"], ["2"]]
+    assert asyncio.run(worksheet.flush()) is False
+    assert worksheet.pending == [["1"], ["2"]]
+
+
+def test_flush_drops_only_rejected_rows(monkeypatch):
+    monkeypatch.setattr(bot.AsyncWorksheet, "instances", [])
+    worksheet = bot.AsyncWorksheet("Users")
+
+    async def append_rows(method, rows):
+        if ["bad"] in rows:
+            raise api_error(400)
+
+    worksheet.call = AsyncMock(side_effect=append_rows)
+    worksheet.pending = [["1"], ["bad"], ["2"]]
+    assert asyncio.run(worksheet.flush()) is True
+    assert worksheet.pending == []
+    assert [call.args[1] for call in worksheet.call.await_args_list][1:] == [[["1"]], [["bad"]], [["2"]]]
+
+
+def test_answer_locally_needs_more_than_one_shared_word():
+    assert bot.answer_locally("what is a startup") is None
+    answer, link = bot.answer_locally("What tracks income vs expenses in a budget?")
+    assert answer.startswith("Budget") and "Financial Planning" in link
+
+
+def test_confirm_edit_updates_companies_row_and_directory(monkeypatch):
+    load_directory([{"ChatID": "1", "Company": "Old Name", "Phone": "", "Email": "", "Description": "",
+                     "Manager": "", "Categories": "", "RegDate": "2025-01-01", "PublicEmail": "No"}])
+    monkeypatch.setitem(bot.approval_index["rows"], "companies", {"1": 5})
+    monkeypatch.setitem(bot.approval_index["headers"], "companies", ["ChatID", "Company", "Phone", "Status"])
+    monkeypatch.setattr(bot, "lookup_profile", AsyncMock())
+    monkeypatch.setattr(bot, "registration_row", AsyncMock(return_value=(2, 0)))
+    monkeypatch.setattr(bot.companies_sheet, "update_cells", AsyncMock())
+    monkeypatch.setattr(bot.network_sheet, "update_row", AsyncMock())
+    update, context = make_callback("confirm:done")
+    context.user_data.update(register_step="confirm", edit_mode=True, company_data={
+        "Company": "New Name", "Phone": "+251911111111", "Email": "a@b.co", "Description": "mill",
+        "Manager": "Sara", "Categories": ["Grain Processing"], "PublicEmail": "Yes"})
+    asyncio.run(bot.button(update, context))
+    bot.companies_sheet.update_cells.assert_awaited_once_with([(5, 2, "New Name"), (5, 3, "+251911111111")])
+    row, values = bot.network_sheet.update_row.await_args.args
+    assert row == 2 and values[1] == "New Name" and values[7] == "2025-01-01"
+    assert bot.search_directory("new") == [0]
+    assert bot.companies_in_category("Grain Processing") == {0}
+
+
+def test_approval_updates_status_cell_and_index(monkeypatch):
+    monkeypatch.setitem(bot.approval_index, "users", {"7": "Pending"})
+    monkeypatch.setitem(bot.approval_index["rows"], "users", {"7": 3})
+    monkeypatch.setitem(bot.approval_index["headers"], "users", ["ChatID", "Name", "Status"])
+    monkeypatch.setattr(bot, "lookup_profile", AsyncMock())
+    monkeypatch.setattr(bot.users_sheet, "flush", AsyncMock(return_value=True))
+    monkeypatch.setattr(bot.users_sheet, "update_cell", AsyncMock())
+    update, context = make_callback("approve:7_2025", user_id=int(bot.MANAGER_CHAT_ID))
+    context.bot_data["pending_registrations"] = {"7_2025": {"chat_id": "7", "type": "users"}}
+    asyncio.run(bot.button(update, context))
+    bot.users_sheet.update_cell.assert_awaited_once_with(3, 3, "Approved")
+    assert bot.approval_index["users"]["7"] == "Approved"
+    assert context.bot.send_message.await_args.args[0] == "7"
+
+
+class FakeSheet:
+    # Just enough of a gspread worksheet for refresh_values(): batch_get on A1 ranges
+    def __init__(self, values, grid_rows=None):
+        self.values, self.grid_rows = values, grid_rows or len(values)
+
+    def batch_get(self, ranges):
+        results = []
+        for a1 in ranges:
+            if a1 == "1:1":
+                results.append(self.values[:1])
+            elif a1 == "A:A":
+                results.append([row[:1] for row in self.values])
+            else:
+                start, end = a1.split(":")
+                first = bot.gspread.utils.a1_to_rowcol(start)[0]
+                last, width = bot.gspread.utils.a1_to_rowcol(end)
+                if last > self.grid_rows:
+                    raise api_error(400)
+                results.append([row[:width] for row in self.values[first - 1:last]])
+        return results
+
+    def get_all_values(self):
+        return [list(row) for row in self.values]
+
+
+def make_synced_sheet(monkeypatch, values):
+    monkeypatch.setattr(bot.AsyncWorksheet, "instances", [])
+    worksheet = bot.AsyncWorksheet("Companies")
+    worksheet.worksheet = FakeSheet([list(row) for row in values])
+    monkeypatch.setattr(bot, "run_governed", lambda kind, func, timeout=None: asyncio.sleep(0, func()))
+    asyncio.run(worksheet.full_refresh())
+    return worksheet
+
+
+def test_refresh_values_reads_appended_rows_in_a_full_grid(monkeypatch):
+    worksheet = make_synced_sheet(monkeypatch, [["ChatID", "Company"], ["1", "A"]])
+    worksheet.worksheet.values.append(["2", "B"])
+    worksheet.worksheet.grid_rows = 3
+    values, changed = asyncio.run(worksheet.refresh_values())
+    assert changed == [3] and values[2] == ["2", "B"]
+
+
+def test_refresh_values_reloads_when_a_column_is_added(monkeypatch):
+    worksheet = make_synced_sheet(monkeypatch, [["ChatID", "Company"], ["1", "A"]])
+    worksheet.worksheet.values = [["ChatID", "Company", "Status"], ["1", "A", "Approved"]]
+    values, changed = asyncio.run(worksheet.refresh_values())
+    assert changed is None and values[1] == ["1", "A", "Approved"]
+
+
+def test_refresh_values_reloads_on_out_of_grid_ranges(monkeypatch):
+    worksheet = make_synced_sheet(monkeypatch, [["ChatID", "Company"], ["1", "A"], ["2", "B"]])
+    worksheet.worksheet.values, worksheet.worksheet.grid_rows = [["ChatID", "Company"], ["1", "A"]], 2
+    values, changed = asyncio.run(worksheet.refresh_values())
+    assert changed is None and values == [["ChatID", "Company"], ["1", "A"]]
+
+
+def test_network_list_skips_owners_whose_latest_row_does_not_match(monkeypatch):
+    base = {"Phone": "", "Email": "", "Description": "", "Manager": "", "RegDate": "", "PublicEmail": "No"}
+    load_directory([
+        dict(base, ChatID="1", Company="Old Mill", Categories="Grain Processing"),
+        dict(base, ChatID="2", Company="Grain Co", Categories="Grain Processing"),
+        dict(base, ChatID="1", Company="New Bakery", Categories="Biscuit Production"),
+    ])
+    update, context = make_callback("cat:Grain Processing")
+    asyncio.run(bot.button(update, context))
+    text = update.callback_query.edit_message_text.await_args.args[0]
+    assert "Grain Co" in text and "New Bakery" not in text and "Old Mill" not in text
+
+
+def test_old_page_callbacks_count_as_expired():
+    update, context = make_callback("page:1:Grain Processing:")
+    asyncio.run(bot.button(update, context))
+    assert "expired" in update.callback_query.edit_message_text.await_args.args[0]
+
+
+def test_worksheet_resolution_takes_its_own_read_token(monkeypatch):
+    kinds = []
+
+    async def run_governed(kind, func, timeout=None):
+        kinds.append(kind)
+        return func()
+
+    monkeypatch.setattr(bot.AsyncWorksheet, "instances", [])
+    monkeypatch.setattr(bot, "run_governed", run_governed)
+    monkeypatch.setattr(bot, "get_spreadsheet", lambda: SimpleNamespace(worksheet=lambda name: FakeSheet([["ChatID"]])))
+    worksheet = bot.AsyncWorksheet("Users")
+    asyncio.run(worksheet.call("get_all_values"))
+    asyncio.run(worksheet.call("get_all_values"))
+    assert kinds == ["read", "read", "read"]
+
+
+def test_broadcast_saves_progress_by_count_in_the_background(monkeypatch):
+    statuses = []
+
+    async def save(status="Running"):
+        await asyncio.sleep(0.05)
+        statuses.append((status, bot.broadcast_state["current"]["cursor"]))
+
+    recipients = [f"{n:04d}" for n in range(250)]
+    monkeypatch.setattr(bot, "BROADCAST_RATE", 1e6)
+    monkeypatch.setattr(bot, "BROADCAST_SAVE_EVERY", 100)
+    monkeypatch.setattr(bot, "save_broadcast_progress", save)
+    monkeypatch.setattr(bot, "news_subscribers", AsyncMock(return_value=set(recipients)))
+    monkeypatch.setitem(bot.broadcast_state, "current", {"text": "hi", "cursor": "", "delivered": 0,
+                                                         "failed": 0, "total": len(recipients)})
+    fake_bot = SimpleNamespace(send_message=AsyncMock())
+    asyncio.run(bot.run_broadcast(fake_bot))
+    assert fake_bot.send_message.await_count == len(recipients) + 1  # plus the manager report
+    assert statuses[-1] == ("Finished", recipients[-1])
+    assert all(status == "Running" for status, cursor in statuses[:-1]) and len(statuses) >= 2
+
+
+def make_message(text, chat_id=1):
+    message = SimpleNamespace(chat_id=chat_id, text=text, reply_text=AsyncMock())
+    update = SimpleNamespace(message=message, callback_query=None)
+    context = SimpleNamespace(user_data={}, bot_data={}, bot=SimpleNamespace(send_message=AsyncMock()))
+    return update, context
+
+
+def test_badge_is_remembered_only_after_it_is_written(monkeypatch):
+    monkeypatch.setattr(bot, "badge_awarded", set())
+    monkeypatch.setattr(bot, "add_connection", lambda *args: None)
+    monkeypatch.setattr(bot, "get_connection_count", AsyncMock(return_value=bot.CONNECTOR_BADGE_MIN_CONNECTIONS))
+    monkeypatch.setattr(bot.users_sheet, "find", AsyncMock(return_value=SimpleNamespace(row=4)))
+    monkeypatch.setattr(bot.users_sheet, "cell", AsyncMock(return_value=SimpleNamespace(value="")))
+    monkeypatch.setattr(bot.users_sheet, "update_cell", AsyncMock(side_effect=api_error(503)))
+    update, context = make_message("5", chat_id=9)
+    context.user_data.update(rate_step=True, rate_company="Grain Co")
+    asyncio.run(bot.handle_reply(update, context))
+    assert "9" not in bot.badge_awarded
+    bot.users_sheet.update_cell.side_effect = None
+    context.user_data.update(rate_step=True, rate_company="Grain Co")
+    asyncio.run(bot.handle_reply(update, context))
+    bot.users_sheet.update_cell.assert_awaited_with(4, 8, bot.CONNECTOR_BADGE)
+    assert "9" in bot.badge_awarded